@@ -1,9 +1,13 @@
 import os
-from typing import Dict, List, Literal, TypeAlias
+import shutil
+import hashlib
+import datetime
+from typing import Any, Dict, List, Literal, Tuple, TypeAlias
 import pandas as pd
 
 SCRAPED_DIR_PATH: str = os.path.join(os.path.abspath(os.path.dirname(__file__)), "scraped")
-SCRAPED_STOCK_FILE_PATH: str = os.path.join(SCRAPED_DIR_PATH, "stocks.csv")
+SCRAPED_STOCK_STORE_PATH: str = os.path.join(SCRAPED_DIR_PATH, "stocks")
+SCRAPED_STOCK_PARTITION_COLUMNS: List[str] = ["area", "symbol"]
 SCRAPED_TRADED_STOCK_LIST_FILE_PATH: str = os.path.join(SCRAPED_DIR_PATH, "traded_stocks.csv")
 
 SETUP_STOCK_FILE_PATH: str = os.path.join(os.path.abspath(os.path.dirname(__file__)), "setup", "stocks_setup.json")
@@ -11,6 +15,13 @@ SETUP_STOCK_COMPANY_ALIAS: TypeAlias = Dict[Literal["company_name", "stock_id"],
 SETUP_STOCK_ALIAS: TypeAlias = Dict[str, List[SETUP_STOCK_COMPANY_ALIAS]]
 
 OUTPUT_DIR_PATH: str = os.path.join(os.path.abspath(os.path.dirname(__file__)), "output")
+COLUMN_TRANSFORMER_DIR_PATH: str = os.path.join(OUTPUT_DIR_PATH, "column_transformers")
+
+CACHE_DIR_PATH: str = os.path.join(os.path.abspath(os.path.dirname(__file__)), "cache")
+RESPONSE_CACHE_DIR_PATH: str = os.path.join(CACHE_DIR_PATH, "responses")
+FEATURE_STORE_DIR_PATH: str = os.path.join(CACHE_DIR_PATH, "features")
+MATRIX_CACHE_DIR_PATH: str = os.path.join(CACHE_DIR_PATH, "matrices")
+OPTUNA_STORAGE_FILE_PATH: str = os.path.join(CACHE_DIR_PATH, "optuna.db")
 
 
 def save_output(df: pd.DataFrame, file_name: str) -> None:
@@ -24,17 +35,78 @@ def load_output(file_name: str, dtypes: Dict | None = None, parse_dates: List[st
         return pd.DataFrame()
 
 
-def load_scraped_stocks() -> pd.DataFrame:
-    return pd.read_csv(
-        SCRAPED_STOCK_FILE_PATH,
-        dtype={
-            "Date": "period[D]",
-            "Open": "float",
-            "High": "float",
-            "Low": "float",
-            "Close": "float",
-            "Volume": "int",
-            "Area": "category",
-            "Symbol": "category",
-        },
+def save_scraped_stocks(df: pd.DataFrame) -> None:
+    """Saves the stocks into the columnar store, one parquet partition per area and symbol.
+    Only the partitions of the symbols present in the data frame are replaced.
+    """
+    df = df.assign(date=df["date"].dt.to_timestamp())
+    df.to_parquet(
+        SCRAPED_STOCK_STORE_PATH,
+        partition_cols=SCRAPED_STOCK_PARTITION_COLUMNS,
+        index=False,
+        existing_data_behavior="delete_matching",
     )
+
+
+def remove_scraped_stocks(symbols: List[str]) -> None:
+    if not os.path.exists(SCRAPED_STOCK_STORE_PATH):
+        return
+
+    for area_dir in os.scandir(SCRAPED_STOCK_STORE_PATH):
+        for symbol in symbols:
+            symbol_dir = os.path.join(area_dir.path, f"symbol={symbol}")
+            if os.path.isdir(symbol_dir):
+                shutil.rmtree(symbol_dir)
+        if not os.listdir(area_dir.path):
+            os.rmdir(area_dir.path)
+
+    if not os.listdir(SCRAPED_STOCK_STORE_PATH):
+        os.rmdir(SCRAPED_STOCK_STORE_PATH)
+
+
+def load_scraped_stocks(
+    columns: List[str] | None = None,
+    symbols: List[str] | None = None,
+    start_date: datetime.date | None = None,
+    end_date: datetime.date | None = None,
+) -> pd.DataFrame:
+    """Loads the stocks from the columnar store.
+    Only the requested columns are read, and only the partitions and row groups matching the symbols and dates.
+    """
+    if not os.path.exists(SCRAPED_STOCK_STORE_PATH) or not os.listdir(SCRAPED_STOCK_STORE_PATH):
+        return pd.DataFrame(columns=columns)
+
+    filters: List[Tuple[str, str, Any]] = []
+    if symbols is not None:
+        filters.append(("symbol", "in", symbols))
+    if start_date is not None:
+        filters.append(("date", ">=", pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append(("date", "<=", pd.Timestamp(end_date)))
+
+    df = pd.read_parquet(SCRAPED_STOCK_STORE_PATH, columns=columns, filters=filters or None)
+
+    if "date" in df.columns:
+        df["date"] = df["date"].dt.to_period("D")
+    for column in SCRAPED_STOCK_PARTITION_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].cat.remove_unused_categories()
+
+    return df
+
+
+def get_scraped_stocks_fingerprint() -> str:
+    """Returns a hash of the paths, sizes and modification times of the files of the columnar store.
+    It changes whenever the stocks are saved or removed, without reading the stocks themselves.
+    """
+    digest = hashlib.sha256()
+    if not os.path.exists(SCRAPED_STOCK_STORE_PATH):
+        return digest.hexdigest()
+
+    for directory, _, file_names in sorted(os.walk(SCRAPED_STOCK_STORE_PATH)):
+        for file_name in sorted(file_names):
+            stat = os.stat(os.path.join(directory, file_name))
+            path = os.path.relpath(os.path.join(directory, file_name), SCRAPED_STOCK_STORE_PATH)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+
+    return digest.hexdigest()
@@ -0,0 +1,179 @@
+import time
+import bson
+import pymongo as pm
+from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Set
+from lib.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_BATCH_SIZE: int = 1000
+DEFAULT_MAX_BATCH_BYTES: int = 8 * 1024 * 1024
+DEFAULT_MAX_IN_FLIGHT: int = 4
+
+
+@dataclass
+class BatchResult:
+    batch: int
+    documents: int
+    seconds: float
+    inserted: int = 0
+    upserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    errors: int = 0
+
+
+@dataclass
+class BulkWriteReport:
+    batches: List[BatchResult] = field(default_factory=list)
+
+    @property
+    def documents(self) -> int:
+        return sum(batch.documents for batch in self.batches)
+
+    @property
+    def inserted(self) -> int:
+        return sum(batch.inserted for batch in self.batches)
+
+    @property
+    def upserted(self) -> int:
+        return sum(batch.upserted for batch in self.batches)
+
+    @property
+    def matched(self) -> int:
+        return sum(batch.matched for batch in self.batches)
+
+    @property
+    def modified(self) -> int:
+        return sum(batch.modified for batch in self.batches)
+
+    @property
+    def errors(self) -> int:
+        return sum(batch.errors for batch in self.batches)
+
+
+def chunk_documents(
+    documents: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE, max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES
+) -> Iterator[List[Dict]]:
+    """Splits the documents into the batches of at most `batch_size` documents and `max_batch_bytes` bytes of bson
+    (a single larger document makes a batch of its own).
+    """
+    batch: List[Dict] = []
+    batch_bytes = 0
+    for document in documents:
+        document_bytes = len(bson.encode(document))
+        if batch and (len(batch) >= batch_size or batch_bytes + document_bytes > max_batch_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+
+        batch.append(document)
+        batch_bytes += document_bytes
+
+    if batch:
+        yield batch
+
+
+def create_set_update(document: Dict) -> Dict:
+    return {"$set": {key: value for key, value in document.items() if key != "_id"}}
+
+
+def create_write_operations(
+    documents: List[Dict],
+    upsert_keys: List[str] | None = None,
+    create_update: Callable[[Dict], Dict] = create_set_update,
+) -> List:
+    """Creates the inserts of the documents, or the upserts of the documents matched by the `upsert_keys`
+    (by default replacing the fields of the stored documents, see `create_update`).
+    """
+    if upsert_keys is None:
+        return [pm.InsertOne(document) for document in documents]
+
+    return [
+        pm.UpdateOne({key: document[key] for key in upsert_keys}, create_update(document), upsert=True)
+        for document in documents
+    ]
+
+
+@dataclass
+class BulkWriter:
+    """Writes the documents into a collection in unordered bulk writes of bounded batches,
+    with up to `max_in_flight` batches written in parallel.
+
+    A failed document (e.g. a duplicate key) does not stop the rest of its batch, it is counted in the errors
+    of the batch. With the `upsert_keys` the documents replace the fields of the stored documents with the same keys,
+    so that the same documents can be written again (e.g. by a restarted run) without duplicates.
+    """
+
+    batch_size: int = DEFAULT_BATCH_SIZE
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT
+
+    def write_batch(
+        self,
+        collection: pm.collection.Collection,
+        batch: int,
+        documents: List[Dict],
+        upsert_keys: List[str] | None,
+        create_update: Callable[[Dict], Dict] = create_set_update,
+    ) -> BatchResult:
+        start = time.perf_counter()
+        details: Mapping[str, Any]
+        try:
+            operations = create_write_operations(documents, upsert_keys, create_update)
+            result = collection.bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except pm.errors.BulkWriteError as error:
+            details = error.details
+
+        batch_result = BatchResult(
+            batch=batch,
+            documents=len(documents),
+            seconds=time.perf_counter() - start,
+            inserted=details.get("nInserted", 0),
+            upserted=details.get("nUpserted", 0),
+            matched=details.get("nMatched", 0),
+            modified=details.get("nModified", 0),
+            errors=len(details.get("writeErrors", [])) + len(details.get("writeConcernErrors", [])),
+        )
+        logger.info(
+            f"Batch {batch} of {collection.name}: {len(documents)} documents in {batch_result.seconds:.2f}s, "
+            f"{batch_result.errors} errors"
+        )
+
+        return batch_result
+
+    def write(
+        self,
+        collection: pm.collection.Collection,
+        documents: Iterable[Dict],
+        upsert_keys: List[str] | None = None,
+        create_update: Callable[[Dict], Dict] = create_set_update,
+    ) -> BulkWriteReport:
+        report = BulkWriteReport()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            # --- NOTE ---
+            # The batches are submitted only when one of the batches in flight is done,
+            # so that the documents are not all encoded and held in memory at once.
+            in_flight: Set[Future] = set()
+            for batch, batch_documents in enumerate(
+                chunk_documents(documents, self.batch_size, self.max_batch_bytes), start=1
+            ):
+                if len(in_flight) >= self.max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    report.batches.extend(future.result() for future in done)
+                in_flight.add(
+                    executor.submit(self.write_batch, collection, batch, batch_documents, upsert_keys, create_update)
+                )
+
+            report.batches.extend(future.result() for future in wait(in_flight).done)
+
+        report.batches.sort(key=lambda batch_result: batch_result.batch)
+        logger.info(
+            f"Written {report.documents} documents into {collection.name} in {len(report.batches)} batches: "
+            f"{report.inserted} inserted, {report.upserted} upserted, {report.matched} matched, "
+            f"{report.modified} modified, {report.errors} errors"
+        )
+
+        return report
@@ -0,0 +1,82 @@
+import datetime
+from typing import Any, Dict, List, Tuple
+
+HISTORY_BUCKET_FIELDS: List[str] = ["open", "high", "low", "close", "volume"]
+
+
+def get_bucket_month(date: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime(date.year, date.month, 1)
+
+
+def get_bucket_day(date: datetime.datetime) -> str:
+    """Returns the key of the date in the days of a bucket (the field names can not contain dots)."""
+    return date.strftime("%Y-%m-%d")
+
+
+def make_history_bucket(stock: Any, month: datetime.datetime, histories: List[Dict]) -> Dict:
+    """Returns the bucket of the histories of a stock in a month: the values of every day keyed by the date
+    and the array of the dates (the later of the histories of the same date is kept).
+
+    NOTE: The array of the dates is only queried by its index, the dates added by the later writes of the bucket
+    (see `make_history_bucket_update`) are not sorted. The histories are sorted when the bucket is unpacked.
+    """
+    by_date = {history["date"]: history for history in histories}
+    dates = sorted(by_date)
+
+    return {
+        "stock": stock,
+        "month": month,
+        "start_date": dates[0],
+        "end_date": dates[-1],
+        "date": dates,
+        "days": {
+            get_bucket_day(date): {field: by_date[date].get(field) for field in HISTORY_BUCKET_FIELDS} for date in dates
+        },
+    }
+
+
+def make_history_buckets(histories: List[Dict]) -> List[Dict]:
+    """Groups the history documents (with the `stock` and the `date`) into the buckets of every stock and month."""
+    groups: Dict[Tuple[Any, datetime.datetime], List[Dict]] = {}
+    for history in histories:
+        groups.setdefault((history["stock"], get_bucket_month(history["date"])), []).append(history)
+
+    return [make_history_bucket(stock, month, group) for (stock, month), group in groups.items()]
+
+
+def make_history_bucket_update(bucket: Dict) -> Dict:
+    """Returns the update writing the days of the bucket into the stored bucket of the same stock and month
+    (upserted by them). Every day is set on a field of its own and the dates are added to the set of the dates,
+    so the writes of the other days of the bucket (e.g. by a concurrent publication) are kept, while a later write
+    of the same day replaces its values. The update of a single document is atomic.
+    """
+    return {
+        "$set": {f"days.{day}": values for day, values in bucket["days"].items()},
+        "$addToSet": {"date": {"$each": bucket["date"]}},
+        "$min": {"start_date": bucket["start_date"]},
+        "$max": {"end_date": bucket["end_date"]},
+    }
+
+
+def unpack_history_bucket(bucket: Dict) -> List[Dict]:
+    """Returns the history documents of the bucket sorted by the date."""
+    return [
+        {
+            "stock": bucket["stock"],
+            "date": datetime.datetime.strptime(day, "%Y-%m-%d"),
+            **{field: values.get(field) for field in HISTORY_BUCKET_FIELDS},
+        }
+        for day, values in sorted(bucket["days"].items())
+    ]
+
+
+def unpack_history_buckets(
+    buckets: List[Dict], start_date: datetime.datetime | None = None, end_date: datetime.datetime | None = None
+) -> List[Dict]:
+    """Returns the history documents of the buckets from the start date to the end date (both included)."""
+    return [
+        history
+        for bucket in buckets
+        for history in unpack_history_bucket(bucket)
+        if (start_date is None or history["date"] >= start_date) and (end_date is None or history["date"] <= end_date)
+    ]
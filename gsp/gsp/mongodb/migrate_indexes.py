@@ -0,0 +1,25 @@
+from gsp.mongodb.storage_helper import StorageHelper
+from lib.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def run():
+    """Removes the duplicates of the unique indexes and creates the missing indexes of the storage collections.
+
+    It is run once per database (and after a change of `STORAGE_INDEXES`), outside of the publication.
+    """
+    logger.info("Migrating the indexes...")
+    storage_helper = StorageHelper()
+
+    removed = storage_helper.remove_duplicates()
+    logger.info(f"Removed duplicates: {removed}")
+    created = storage_helper.ensure_indexes()
+    logger.info(f"Ensured indexes: {created}")
+
+    storage_helper.close_connection()
+    logger.info("Migration finished successfully")
+
+
+if __name__ == "__main__":
+    run()
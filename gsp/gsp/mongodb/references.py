@@ -0,0 +1,51 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_REFERENCE_BATCH_SIZE: int = 50_000
+
+
+def collect_reference_ids(documents: List[Dict], field: str) -> List[Any]:
+    """Returns the unique ids referenced by the field of the documents (a single id or a list of them),
+    in the order of their first reference.
+    """
+    ids: Dict[Any, None] = {}
+    for document in documents:
+        if field in document:
+            value = document[field]
+            ids.update(dict.fromkeys(value if isinstance(value, list) else [value]))
+
+    return list(ids)
+
+
+def chunk_ids(ids: List[Any], batch_size: int = DEFAULT_REFERENCE_BATCH_SIZE) -> Iterator[List[Any]]:
+    """Splits the ids into the lists queried at once, so that a query stays below the size limit of a document."""
+    for start in range(0, len(ids), batch_size):
+        yield ids[start : start + batch_size]
+
+
+def get_reference_projection(projection: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Returns the projection of the referenced documents keeping their `_id`, by which they are matched.
+    An inclusion keeps the `_id` explicitly, while an exclusion only loses its exclusion of the `_id`.
+    """
+    if projection is None:
+        return None
+
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if len(fields) == 0 or not all(fields.values()):
+        return fields or None
+
+    return {**fields, "_id": 1}
+
+
+def replace_references(documents: List[Dict], field: str, referenced_documents: Dict[Any, Dict]) -> List[Dict]:
+    """Replaces the ids of the field of the documents with the referenced documents (by their `_id`).
+    A list of ids keeps its order and loses the missing documents, a single missing document becomes None.
+    """
+    for document in documents:
+        if field in document:
+            value = document[field]
+            if isinstance(value, list):
+                document[field] = [referenced_documents[id] for id in value if id in referenced_documents]
+            else:
+                document[field] = referenced_documents.get(value)
+
+    return documents
@@ -27,6 +27,7 @@ def run():
     storage_helper = StorageHelper()
     storage_helper.setup_connection()
     storage_helper.cleanse("v2")
+    storage_helper.ensure_indexes()
 
     # mapping = StockRefMapping()
     # mapping.add("GOOGL", [history])
@@ -5,14 +5,27 @@ from generated.history import History
 from generated.prediction import Prediction
 
 STOCK_NAME_ALIAS: TypeAlias = str
+STOCK_REF_ITEM_ALIAS: TypeAlias = Union[History, Prediction, Dict]
+
+
+def get_document(item: STOCK_REF_ITEM_ALIAS) -> Dict:
+    """Returns the document of the item ready to be written into MongoDB (the documents are returned as they are)."""
+    if isinstance(item, dict):
+        return item
+
+    return {**item.to_dict(), "date": item.date}
+
+
+def get_date(item: STOCK_REF_ITEM_ALIAS) -> Optional[datetime.datetime]:
+    return item.get("date") if isinstance(item, dict) else item.date
 
 
 @dataclass
 class StockRefMapping:
 
-    mapping: Dict[STOCK_NAME_ALIAS, List[Union[History, Prediction]]] = field(default_factory=dict)
+    mapping: Dict[STOCK_NAME_ALIAS, List[STOCK_REF_ITEM_ALIAS]] = field(default_factory=dict)
 
-    def add(self, stock_name: STOCK_NAME_ALIAS, data: List[Union[History, Prediction]]) -> "StockRefMapping":
+    def add(self, stock_name: STOCK_NAME_ALIAS, data: List[STOCK_REF_ITEM_ALIAS]) -> "StockRefMapping":
         if stock_name in self.mapping:
             self.mapping[stock_name].extend(data)
         else:
@@ -20,13 +33,13 @@ class StockRefMapping:
 
         return self
 
-    def get_by_symbol(self, stock_name: STOCK_NAME_ALIAS) -> List[Union[History, Prediction]]:
+    def get_by_symbol(self, stock_name: STOCK_NAME_ALIAS) -> List[STOCK_REF_ITEM_ALIAS]:
         return self.mapping.get(stock_name, [])
 
     def get_symbols(self) -> List[STOCK_NAME_ALIAS]:
         return list(self.mapping.keys())
 
-    def get_items(self) -> List[Tuple[STOCK_NAME_ALIAS, List[Union[History, Prediction]]]]:
+    def get_items(self) -> List[Tuple[STOCK_NAME_ALIAS, List[STOCK_REF_ITEM_ALIAS]]]:
         return [(stock_name, stock) for stock_name, stock in self.mapping.items()]
 
     def filter_by_date(
@@ -41,7 +54,7 @@ class StockRefMapping:
 
         for stock_name, data in self.mapping.items():
             self.mapping[stock_name] = [
-                d for d in data if (d.date and d.date >= start_date_obj and d.date <= end_date_obj)
+                d for d in data if ((date := get_date(d)) and date >= start_date_obj and date <= end_date_obj)
             ]
 
         return self
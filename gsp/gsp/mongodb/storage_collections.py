@@ -5,5 +5,6 @@ class StorageCollections(Enum):
 
     STOCKS = "stocks-v2"
     HISTORIES = "histories-v2"
+    HISTORY_BUCKETS = "history-buckets-v2"
     PREDICTIONS = "predictions-v2"
     GENERATIONS = "generations-v2"
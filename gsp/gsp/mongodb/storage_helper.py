@@ -1,15 +1,26 @@
 import datetime
+import hashlib
 import re
 from dataclasses import dataclass
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import pymongo as pm
+from bson import ObjectId
 from dotenv import load_dotenv
 from lib.logger.setup import setup_logger
 from generated.stock import Stock
 from generated.generation import Generation
+from gsp.mongodb.bulk_writer import BulkWriteReport, BulkWriter, create_set_update
+from gsp.mongodb.references import (
+    chunk_ids,
+    collect_reference_ids,
+    get_reference_projection,
+    replace_references,
+)
+from gsp.mongodb.history_buckets import make_history_bucket_update, make_history_buckets, unpack_history_buckets
 from gsp.mongodb.storage_collections import StorageCollections
-from gsp.mongodb.stock_ref_mapping import StockRefMapping
+from gsp.mongodb.storage_indexes import ensure_indexes, remove_duplicates
+from gsp.mongodb.stock_ref_mapping import StockRefMapping, get_document
 
 logger = setup_logger(__name__)
 
@@ -21,6 +32,7 @@ class StorageHelper:
     db_user: Optional[str] = None
     db_password: Optional[str] = None
     cluster_name: Optional[str] = None
+    bucketed_histories: bool = False  # --- NOTICE --- Histories stored in the buckets of a stock and a month
 
     # --- GENERIC METHODS ---
     def __post_init__(self):
@@ -51,6 +63,22 @@ class StorageHelper:
 
         return self
 
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Creates the missing indexes of the storage collections (see `STORAGE_INDEXES`)."""
+        logger.info("Ensuring indexes...")
+        if self.client is None or self.db_name is None:
+            raise Exception("No connection established")
+
+        return ensure_indexes(self.client[self.db_name])
+
+    def remove_duplicates(self) -> Dict[str, int]:
+        """Removes the duplicates of the unique indexes of the storage collections (see `remove_duplicates`)."""
+        logger.info("Removing duplicates...")
+        if self.client is None or self.db_name is None:
+            raise Exception("No connection established")
+
+        return remove_duplicates(self.client[self.db_name])
+
     def close_connection(self) -> None:
         logger.info("Closing connection...")
         if self.client:
@@ -67,17 +95,38 @@ class StorageHelper:
         return collection
 
     def load_collection_documents(
-        self, collection_enum: StorageCollections, reference: Dict[str, StorageCollections] = {}
+        self,
+        collection_enum: StorageCollections,
+        reference: Dict[str, StorageCollections] = {},
+        projection: Dict[str, Any] | None = None,
+        reference_projection: Dict[str, Dict[str, Any]] = {},
     ):
+        """Loads the documents of the collection and replaces the ids of the `reference` fields with the documents
+        of the referenced collections. The referenced documents of a field are loaded at once for all the documents.
+
+        Args:
+            collection_enum (StorageCollections): the collection of the documents
+            reference (Dict[str, StorageCollections]): the referenced collection of every field
+            projection (Dict[str, Any] | None): the projection of the documents (the reference fields have to be kept)
+            reference_projection (Dict[str, Dict[str, Any]]): the projection of the referenced documents of a field
+                (their `_id` is always kept)
+        """
         logger.info(f"Loading documents from {collection_enum.value}...")
         collection = self.load_collection(collection_enum)
-        documents = list(collection.find())
-        for document in documents:
-            for field, ref_collection in reference.items():
-                if field in document:
-                    ref_ids = document[field] if isinstance(document[field], list) else [document[field]]
-                    ref_data = list(self.load_collection(ref_collection).find({"_id": {"$in": ref_ids}}))
-                    document[field] = ref_data if isinstance(document[field], list) else ref_data[0]
+        documents = list(collection.find({}, projection))
+        for field, ref_collection in reference.items():
+            ref_ids = collect_reference_ids(documents, field)
+            ref_documents: Dict[Any, Dict] = {}
+            for ids in chunk_ids(ref_ids):
+                ref_documents.update(
+                    (ref_document["_id"], ref_document)
+                    for ref_document in self.load_collection(ref_collection).find(
+                        {"_id": {"$in": ids}}, get_reference_projection(reference_projection.get(field))
+                    )
+                )
+            logger.info(f"Resolved {len(ref_documents)} of {len(ref_ids)} references of {field}")
+            replace_references(documents, field, ref_documents)
+
         return documents
 
     def insert_documents(self, collection_enum: StorageCollections, documents: List[Dict]):
@@ -87,6 +136,35 @@ class StorageHelper:
 
         return results
 
+    def bulk_write_documents(
+        self,
+        collection_enum: StorageCollections,
+        documents: Iterable[Dict],
+        upsert_keys: List[str] | None = None,
+        bulk_writer: BulkWriter | None = None,
+        create_update: Callable[[Dict], Dict] = create_set_update,
+    ) -> BulkWriteReport:
+        """Writes the documents in unordered batches written in parallel (see `BulkWriter`),
+        upserting them by the `upsert_keys` (with the updates of `create_update`) when they are given.
+
+        NOTE: The batches are all written before the failed documents are reported, the written documents are kept.
+        Raises an exception when some of the documents failed to be written.
+        """
+        logger.info(f"Bulk writing documents into {collection_enum.value}...")
+        collection = self.load_collection(collection_enum)
+        report = (bulk_writer or BulkWriter()).write(
+            collection, documents, upsert_keys=upsert_keys, create_update=create_update
+        )
+
+        if report.errors > 0:
+            message = (
+                f"{report.errors} of {report.documents} documents failed to be written into {collection_enum.value}"
+            )
+            logger.error(message)
+            raise Exception(message)
+
+        return report
+
     def delete_documents(self, collection_enum: StorageCollections, query: Dict) -> None:
         logger.info(f"Deleting documents from {collection_enum.value}...")
         collection = self.load_collection(collection_enum)
@@ -118,19 +196,54 @@ class StorageHelper:
             stock.id = results.inserted_ids[i]
         return stocks
 
+    def get_histories_collection(self) -> pm.collection.Collection:
+        return self.load_collection(
+            StorageCollections.HISTORY_BUCKETS if self.bucketed_histories else StorageCollections.HISTORIES
+        )
+
     def exists_history_for_date(self, date: datetime.date) -> bool:
         logger.info("Checking if histories exist for date...")
-        histories_collection: pm.collection.Collection = self.load_collection(StorageCollections.HISTORIES)
+        histories_collection: pm.collection.Collection = self.get_histories_collection()
+        # --- NOTE --- The dates of a bucket are an array, which matches the date of any of its histories.
         history = histories_collection.find_one({"date": datetime.datetime(date.year, date.month, date.day)})
 
         return history is not None
 
     def get_latest_history_date(self) -> Optional[datetime.date]:
         logger.info("Getting the date of the last history...")
-        histories_collection: pm.collection.Collection = self.load_collection(StorageCollections.HISTORIES)
-        last_history = histories_collection.find_one(filter={}, sort=[("date", pm.DESCENDING)])
+        date_field = "end_date" if self.bucketed_histories else "date"
+        histories_collection: pm.collection.Collection = self.get_histories_collection()
+        last_history = histories_collection.find_one(filter={}, sort=[(date_field, pm.DESCENDING)])
+
+        return last_history[date_field].date() if last_history is not None else None
+
+    def load_histories(
+        self,
+        stock_ids: Optional[List] = None,
+        start_date: Optional[datetime.date] = None,
+        end_date: Optional[datetime.date] = None,
+    ) -> List[Dict]:
+        """Loads the history documents (a document per stock and date) of the stocks from the start date
+        to the end date (both included), from either of the layouts of the histories.
+        """
+        logger.info("Loading histories...")
+        start = datetime.datetime.combine(start_date, datetime.time.min) if start_date is not None else None
+        end = datetime.datetime.combine(end_date, datetime.time.max) if end_date is not None else None
+        start_field, end_field = ("end_date", "start_date") if self.bucketed_histories else ("date", "date")
+
+        query: Dict = {}
+        if stock_ids is not None:
+            query["stock"] = {"$in": stock_ids}
+        if start is not None:
+            query[start_field] = {"$gte": start}
+        if end is not None:
+            query[end_field] = {**query.get(end_field, {}), "$lte": end}
 
-        return last_history["date"].date() if last_history is not None else None
+        histories = list(self.get_histories_collection().find(query))
+        if self.bucketed_histories:
+            return unpack_history_buckets(histories, start, end)
+
+        return histories
 
     def exists_generation(self, date: Optional[datetime.date], name: Optional[str]) -> bool:
         logger.info("Checking if generation exists...")
@@ -148,7 +261,7 @@ class StorageHelper:
 
         return generation is not None
 
-    def add_histories(self, mapping: StockRefMapping) -> pm.results.InsertManyResult | None:
+    def add_histories(self, mapping: StockRefMapping) -> BulkWriteReport | None:
         logger.info("Adding histories...")
 
         stocks_symbols: List[str] = mapping.get_symbols()
@@ -165,7 +278,7 @@ class StorageHelper:
         for stock_symbol, histories in mapping.get_items():
             all_histories.extend(
                 [
-                    {**history.to_dict(), "date": history.date, "stock": stocks_retrived_mapping[stock_symbol]["_id"]}
+                    {**get_document(history), "stock": stocks_retrived_mapping[stock_symbol]["_id"]}
                     for history in histories
                 ]
             )
@@ -173,13 +286,34 @@ class StorageHelper:
             logger.warning("No histories to add.")
             return None
 
-        results = self.insert_documents(StorageCollections.HISTORIES, all_histories)
+        if self.bucketed_histories:
+            return self.add_history_buckets(all_histories)
+
+        # --- NOTE ---
+        # The histories are upserted by the stock and the date, so a restarted publication does not duplicate them.
+        results = self.bulk_write_documents(StorageCollections.HISTORIES, all_histories, upsert_keys=["stock", "date"])
 
         return results
 
+    def add_history_buckets(self, histories: List[Dict]) -> BulkWriteReport:
+        """Writes the histories into the buckets of their stocks and months, upserted by them.
+        Every day is set on its own (see `make_history_bucket_update`), so the publications of the histories
+        of the same buckets at once keep each other's days.
+        """
+        logger.info("Adding history buckets...")
+
+        # --- NOTE ---
+        # The concurrent upserts of a new bucket are retried by MongoDB on the duplicate key of the unique index.
+        return self.bulk_write_documents(
+            StorageCollections.HISTORY_BUCKETS,
+            make_history_buckets(histories),
+            upsert_keys=["stock", "month"],
+            create_update=make_history_bucket_update,
+        )
+
     def add_generation_with_predictions(
         self, generation: Generation, mapping: StockRefMapping
-    ) -> Tuple[pm.results.InsertManyResult, pm.results.InsertManyResult]:
+    ) -> Tuple[BulkWriteReport, BulkWriteReport]:
         logger.info("Adding generation with predictions...")
 
         stocks_symbols: List[str] = mapping.get_symbols()
@@ -193,28 +327,41 @@ class StorageHelper:
 
         all_predictions: List[Dict] = []
         for stock_symbol, predictions in mapping.get_items():
-            all_predictions.extend(
-                [
+            stock_id = stocks_retrived_mapping[stock_symbol]["_id"]
+            for prediction in map(get_document, predictions):
+                all_predictions.append(
                     {
-                        **prediction.to_dict(),
-                        "date": prediction.date,
-                        "stock": stocks_retrived_mapping[stock_symbol]["_id"],
+                        **prediction,
+                        "_id": get_prediction_id(generation, stock_id, prediction["date"]),
+                        "stock": stock_id,
                     }
-                    for prediction in predictions
-                ]
-            )
-
-        predictions_results = self.insert_documents(StorageCollections.PREDICTIONS, all_predictions)
-        generation_results = self.insert_documents(
+                )
+
+        # --- NOTE ---
+        # The predictions of different generations share the stock and the date, so they are upserted by their ids
+        # derived from the generation instead. A restarted publication writes the same predictions again.
+        # The generation is written only when all of its predictions are written (the bulk write raises otherwise),
+        # upserted by its name and date so that a restarted publication does not duplicate it either.
+        predictions_results = self.bulk_write_documents(
+            StorageCollections.PREDICTIONS, all_predictions, upsert_keys=["_id"]
+        )
+        generation_results = self.bulk_write_documents(
             StorageCollections.GENERATIONS,
             [
                 {
                     **generation.to_dict(),
                     "date": generation.date,
                     "created_at": generation.created_at,
-                    "predictions": predictions_results.inserted_ids,
+                    "predictions": [prediction["_id"] for prediction in all_predictions],
                 }
             ],
+            upsert_keys=["name", "date"],
         )
 
         return generation_results, predictions_results
+
+
+def get_prediction_id(generation: Generation, stock_id: ObjectId, date: datetime.datetime | None) -> ObjectId:
+    """Returns the id of the prediction derived from its generation, stock and date."""
+    key = f"{generation.name}|{generation.date}|{stock_id}|{date}"
+    return ObjectId(hashlib.sha256(key.encode()).digest()[:12])
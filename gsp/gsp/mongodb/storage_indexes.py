@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterable, List
+import pymongo as pm
+from lib.logger.setup import setup_logger
+from gsp.mongodb.storage_collections import StorageCollections
+
+logger = setup_logger(__name__)
+
+# --- NOTE ---
+# The indexes of the filters and sorts of the storage helper:
+# - stocks: the lookups of the stocks by their symbols
+# - histories: the upserts by the stock and the date, the checks and the sort of the latest date
+# - history buckets: the same queries on the buckets of a stock and a month (the dates are an array)
+# - predictions: the predictions of a stock by the date
+# - generations: the checks of the existing generations by the date and the name
+# The unique indexes fail to be created while the collection holds duplicates, which have to be removed first
+# (see `remove_duplicates` and the one-off `gsp.mongodb.migrate_indexes` command).
+STORAGE_INDEXES: Dict[StorageCollections, List[pm.IndexModel]] = {
+    StorageCollections.STOCKS: [
+        pm.IndexModel([("symbol", pm.ASCENDING)], name="symbol", unique=True),
+    ],
+    StorageCollections.HISTORIES: [
+        pm.IndexModel([("stock", pm.ASCENDING), ("date", pm.ASCENDING)], name="stock_date", unique=True),
+        pm.IndexModel([("date", pm.DESCENDING)], name="date"),
+    ],
+    StorageCollections.HISTORY_BUCKETS: [
+        pm.IndexModel([("stock", pm.ASCENDING), ("month", pm.ASCENDING)], name="stock_month", unique=True),
+        pm.IndexModel([("end_date", pm.DESCENDING)], name="end_date"),
+        pm.IndexModel([("date", pm.ASCENDING)], name="date"),
+    ],
+    StorageCollections.PREDICTIONS: [
+        pm.IndexModel([("stock", pm.ASCENDING), ("date", pm.ASCENDING)], name="stock_date"),
+    ],
+    StorageCollections.GENERATIONS: [
+        pm.IndexModel([("date", pm.ASCENDING), ("name", pm.ASCENDING)], name="date_name"),
+        pm.IndexModel([("name", pm.ASCENDING)], name="name"),
+    ],
+}
+
+
+def ensure_indexes(
+    database: pm.database.Database, collections: Iterable[StorageCollections] = StorageCollections
+) -> Dict[str, List[str]]:
+    """Creates the missing indexes of the collections (the existing ones are kept) and returns their names."""
+    created: Dict[str, List[str]] = {}
+    for collection_enum in collections:
+        indexes = STORAGE_INDEXES.get(collection_enum, [])
+        if len(indexes) > 0:
+            logger.info(f"Ensuring {len(indexes)} indexes of {collection_enum.value}...")
+            created[collection_enum.value] = database[collection_enum.value].create_indexes(indexes)
+
+    return created
+
+
+def remove_duplicates(
+    database: pm.database.Database, collections: Iterable[StorageCollections] = StorageCollections
+) -> Dict[str, int]:
+    """Removes the documents sharing the keys of a unique index of the collections (the first inserted document of
+    the keys is kept) and returns the numbers of the removed documents.
+    """
+    removed: Dict[str, int] = {}
+    for collection_enum in collections:
+        collection = database[collection_enum.value]
+        for index in STORAGE_INDEXES.get(collection_enum, []):
+            if not index.document.get("unique", False):
+                continue
+
+            keys = list(index.document["key"].keys())
+            duplicates = collection.aggregate(
+                [
+                    {"$sort": {"_id": pm.ASCENDING}},
+                    {"$group": {"_id": {key: f"${key}" for key in keys}, "ids": {"$push": "$_id"}}},
+                    {"$match": {"ids.1": {"$exists": True}}},
+                ],
+                allowDiskUse=True,
+            )
+            ids = [duplicate_id for duplicate in duplicates for duplicate_id in duplicate["ids"][1:]]
+            if len(ids) > 0:
+                logger.warning(f"Removing {len(ids)} duplicates of {collection_enum.value} by {keys}...")
+                removed[collection_enum.value] = (
+                    removed.get(collection_enum.value, 0) + collection.delete_many({"_id": {"$in": ids}}).deleted_count
+                )
+
+    return removed
+
+
+def get_plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Returns the stages of the query plan (e.g. the `winningPlan` of an explain) from the top to the leaves,
+    including the branches of the `$or` plans and the plans of the shards.
+    """
+    stages = [plan["stage"]] if "stage" in plan else []
+    children = [plan[key] for key in ["inputStage", "queryPlan"] if key in plan] + plan.get("inputStages", [])
+    children += [shard["winningPlan"] for shard in plan.get("shards", []) if "winningPlan" in shard]
+    for child in children:
+        stages.extend(get_plan_stages(child))
+
+    return stages
+
+
+def is_collection_scan(explain: Dict[str, Any]) -> bool:
+    """Checks whether the winning plan of the explained query scans the whole collection."""
+    return "COLLSCAN" in get_plan_stages(explain["queryPlanner"]["winningPlan"])
@@ -0,0 +1,45 @@
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+HISTORY_COLUMNS: List[str] = ["date", "open", "high", "low", "close", "volume"]
+PREDICTION_COLUMNS: List[str] = ["date", "close"]
+
+
+def get_column_values(column: pd.Series, parse_dates: bool = False) -> np.ndarray:
+    """Returns the values of the column as python objects, the missing values are None."""
+    if parse_dates:
+        values = pd.DatetimeIndex(pd.to_datetime(column, format="ISO8601")).to_pydatetime()
+    else:
+        values = column.to_numpy(dtype=object)
+    values[column.isna().to_numpy()] = None
+
+    return values
+
+
+def get_symbol_records(
+    df: pd.DataFrame,
+    columns: List[str] | None = None,
+    symbols: List[str] | None = None,
+    parse_dates: bool = False,
+) -> Dict[str, List[Dict]]:
+    """Returns the records (a dict of the column values per row) of every symbol, sorted by the symbol.
+
+    The rows are sorted by the symbol once, converted into the records at once and sliced by the boundaries
+    of the symbols, so the cost is linear in the rows. The missing values are None. With `parse_dates` the records
+    are ready to be written into MongoDB: the `date` is a datetime.
+    """
+    if symbols is not None:
+        df = df[df["symbol"].isin(symbols)]
+    df = df.sort_values("symbol", kind="stable")
+    if len(df) == 0:
+        return {}
+
+    columns = list(df.columns) if columns is None else columns
+    values = [get_column_values(df[column], parse_dates and column == "date") for column in columns]
+    records = [dict(zip(columns, row)) for row in zip(*values)]
+
+    sorted_symbols = df["symbol"].astype(str).to_numpy()
+    bounds = np.flatnonzero(np.r_[True, sorted_symbols[1:] != sorted_symbols[:-1], True])
+
+    return {sorted_symbols[start]: records[start:end] for start, end in zip(bounds[:-1], bounds[1:])}
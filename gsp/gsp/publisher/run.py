@@ -21,7 +21,9 @@ logger = setup_logger(__name__)
 def run(run_date: datetime.date):
     logger.info("Starting the publisher...")
     # --- LOAD DATA ---
-    stocks_df = load_scraped_stocks()
+    stocks_df = load_scraped_stocks(
+        columns=["date", "open", "high", "low", "close", "volume", "area", "symbol", "company"], end_date=run_date
+    ).astype({"date": str})
     generation_df = load_output(f"generation_{run_date.isoformat()}.csv")
     prediction_df = load_output(f"prediction_{run_date.isoformat()}.csv")
 
@@ -30,7 +32,7 @@ def run(run_date: datetime.date):
 
     stocks = transform_stocks(stocks_df)
     generation = transform_generation(generation_df)
-    predictions_mapping = transform_predictions(prediction_df)
+    predictions_mapping = transform_predictions(prediction_df, to_generated=False)
     # histories_mapping = transform_histories(stocks_df)
 
     # --- PUBLISH DATA ---
@@ -38,6 +40,7 @@ def run(run_date: datetime.date):
 
     # histories = histories.filter_by_date(start_date=None, end_date=run_date)
 
+    # --- NOTICE --- The indexes are created by the one-off `gsp.mongodb.migrate_indexes` command
     storage_helper = StorageHelper()
 
     loaded_stocks_dicts = storage_helper.load_collection_documents(StorageCollections.STOCKS)
@@ -51,7 +54,11 @@ def run(run_date: datetime.date):
         storage_helper.insert_documents(StorageCollections.STOCKS, [stock.to_dict() for stock in stocks_not_in_db])
         not_in_db_mapping = StockRefMapping()
         histories = transform_histories(
-            stocks_df, [stock.symbol for stock in stocks_not_in_db], start_date=None, end_date=run_date
+            stocks_df,
+            [stock.symbol for stock in stocks_not_in_db],
+            start_date=None,
+            end_date=run_date,
+            to_generated=False,
         )
         for stock in stocks_not_in_db:
             not_in_db_mapping.add(stock.symbol, histories.get_by_symbol(stock.symbol))
@@ -65,7 +72,11 @@ def run(run_date: datetime.date):
             latest_history_date = run_date
 
         stocks_in_db_new_histories = transform_histories(
-            stocks_df, [stock.symbol for stock in stocks_in_db], start_date=latest_history_date, end_date=run_date
+            stocks_df,
+            [stock.symbol for stock in stocks_in_db],
+            start_date=latest_history_date,
+            end_date=run_date,
+            to_generated=False,
         )
         stocks_in_db_mapping = StockRefMapping()
 
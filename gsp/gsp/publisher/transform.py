@@ -2,11 +2,12 @@ import datetime
 import json
 import pandas as pd
 from generated.generation import Generation
-from typing import List, Optional, cast
+from typing import List, Optional
 from generated.history import History
 from generated.prediction import Prediction
 from generated.stock import Stock
-from gsp.mongodb.stock_ref_mapping import StockRefMapping
+from gsp.mongodb.stock_ref_mapping import STOCK_REF_ITEM_ALIAS, StockRefMapping
+from gsp.publisher.records import HISTORY_COLUMNS, PREDICTION_COLUMNS, get_symbol_records
 from lib.logger.setup import setup_logger
 
 logger = setup_logger(__name__)
@@ -39,28 +40,22 @@ def transform_generation(df: pd.DataFrame) -> Generation:
 
 def transform_stocks(df: pd.DataFrame) -> List[Stock]:
     logger.info("Transforming stocks data...")
-    stocks_symbols = df["symbol"].unique()
-    stocks: List[Stock] = []
+    stocks_records = get_symbol_records(df.drop_duplicates("symbol"))
 
-    for stock_symbol in stocks_symbols:
-        stock_df = cast(pd.DataFrame, df[df["symbol"] == stock_symbol])
-        stock_data = stock_df.head(1).to_dict(orient="records")[0]
-        stock = Stock.from_dict(stock_data)
-        stocks.append(stock)
+    return [Stock.from_dict(records[0]) for records in stocks_records.values()]
 
-    return stocks
 
-
-def transform_predictions(df: pd.DataFrame) -> StockRefMapping:
+def transform_predictions(df: pd.DataFrame, to_generated: bool = True) -> StockRefMapping:
+    """Groups the predictions by the symbol, as the generated `Prediction` or (without `to_generated`)
+    as the documents ready to be written into MongoDB.
+    """
     logger.info("Transforming predictions data...")
     mapping = StockRefMapping()
-    stock_symbols = df["symbol"].unique()
+    predictions_records = get_symbol_records(df, PREDICTION_COLUMNS, parse_dates=not to_generated)
 
-    for stock_symbol in stock_symbols:
-        stock_df = df.where(df["symbol"] == stock_symbol).dropna()
-        predictions_data = stock_df.to_dict(orient="records")
-        predictions = [Prediction.from_dict(prediction) for prediction in predictions_data]
-        mapping.add(stock_symbol, predictions)  # type: ignore
+    for stock_symbol, records in predictions_records.items():
+        predictions: List[STOCK_REF_ITEM_ALIAS] = [*map(Prediction.from_dict, records)] if to_generated else [*records]
+        mapping.add(stock_symbol, predictions)
 
     return mapping
 
@@ -70,26 +65,25 @@ def transform_histories(
     filtered_symbols: List[str],
     start_date: Optional[datetime.date],
     end_date: Optional[datetime.date],
+    to_generated: bool = True,
 ) -> StockRefMapping:
+    """Groups the histories of the filtered symbols by the symbol, as the generated `History` or
+    (without `to_generated`) as the documents ready to be written into MongoDB.
+    """
     logger.info("Transforming histories data...")
     mapping = StockRefMapping()
-    df_cpy = df.copy()
 
     if start_date is not None:
         logger.info(f"Filtering data from {start_date.isoformat()}")
-        df_cpy = df_cpy[df_cpy["date"] >= start_date.isoformat()]
+        df = df[df["date"] >= start_date.isoformat()]
     if end_date is not None:
         logger.info(f"Filtering data until {end_date.isoformat()}")
-        df_cpy = df_cpy[df_cpy["date"] <= end_date.isoformat()]
+        df = df[df["date"] <= end_date.isoformat()]
 
-    stock_symbols = df_cpy["symbol"].unique()
+    histories_records = get_symbol_records(df, HISTORY_COLUMNS, symbols=filtered_symbols, parse_dates=not to_generated)
 
-    for stock_symbol in stock_symbols:
-        if stock_symbol not in filtered_symbols:
-            continue
-        stock_df = cast(pd.DataFrame, df_cpy[df_cpy["symbol"] == stock_symbol])
-        histories_data = stock_df.to_dict(orient="records")
-        histories = [History.from_dict(history) for history in histories_data]
-        mapping.add(stock_symbol, histories)  # type: ignore
+    for stock_symbol, records in histories_records.items():
+        histories: List[STOCK_REF_ITEM_ALIAS] = [*map(History.from_dict, records)] if to_generated else [*records]
+        mapping.add(stock_symbol, histories)
 
     return mapping
@@ -1,5 +1,6 @@
 import datetime
 from gsp.scraper.run import scrape
+from gsp.scraper.cache import ResponseCache
 from lib.logger.setup import setup_logger
 from gsp.model.model import generate_prediction
 from gsp.publisher.run import run as publisher_run
@@ -7,12 +8,12 @@ from gsp.publisher.run import run as publisher_run
 logger = setup_logger(__name__)
 
 
-def run(run_date: datetime.date):
+def run(run_date: datetime.date, offline: bool = False):
 
     logger.info(f"Running GSP for {run_date.isoformat()}...")
 
     logger.info("Scraping data...")
-    scrape(run_date)
+    scrape(run_date, cache=ResponseCache(offline=offline))
 
     logger.info("Running Model...")
     generate_prediction(
@@ -0,0 +1,140 @@
+import sys
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import resource
+import multiprocessing
+import numpy as np
+from dataclasses import asdict, dataclass
+from typing import List
+import data
+import gsp.scraper.run as scraper_run
+from lib.logger.setup import setup_logger
+from gsp.scraper.fake_yahoo_server import YAHOO_CSV_HEADER, FakeYahooServer
+from gsp.scraper.scheduler import RequestScheduler
+
+logger = setup_logger(__name__)
+
+DEFAULT_SYMBOL_COUNTS: List[int] = [50, 500, 5000]
+DEFAULT_LATENCY_SECONDS: float = 0.05
+DEFAULT_HISTORY_ROWS: int = 2520
+DEFAULT_ERROR_RATE: float = 0.0
+DEFAULT_RATE_PER_SECOND: float = 1000.0
+BENCHMARK_RUN_DATE: datetime.date = datetime.date(2024, 5, 31)
+
+
+def generate_history(rows: int, end_date: datetime.date, seed: int = 0) -> List[str]:
+    """Generates the csv rows (without the header) of a random walk history of business days ending at the end date."""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64(end_date, "D"), -np.arange(rows)[::-1], roll="backward")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    volume = rng.integers(1_000, 1_000_000, rows)
+
+    return [
+        f"{date},{price:.4f},{price * 1.01:.4f},{price * 0.99:.4f},{price:.4f},{price:.4f},{size}\n"
+        for date, price, size in zip(dates.astype(str), close, volume)
+    ]
+
+
+@dataclass
+class BenchmarkResult:
+    symbols: int
+    seconds: float
+    symbols_per_second: float
+    bytes_per_second: float
+    peak_rss_bytes: int
+    p50_latency_seconds: float
+    p99_latency_seconds: float
+    requests: int
+    dead_letters: int
+
+
+def get_peak_rss_bytes() -> int:
+    """Returns the peak resident set size of the process (reported in kilobytes on linux and in bytes on macos)."""
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def run_benchmark(
+    symbols: int,
+    latency: float = DEFAULT_LATENCY_SECONDS,
+    rows: int = DEFAULT_HISTORY_ROWS,
+    error_rate: float = DEFAULT_ERROR_RATE,
+    max_workers: int = scraper_run.DEFAULT_MAX_WORKERS,
+    rate: float = DEFAULT_RATE_PER_SECOND,
+) -> BenchmarkResult:
+    """Runs the whole scraping of `symbols` stocks against the fake yahoo endpoint into a temporary store.
+
+    NOTE: The peak rss is the peak of the whole process, run every benchmark in a fresh process to compare them.
+    """
+    stock_setup = {
+        f"area_{area}": [{"company_name": f"Company {i}", "stock_id": f"S{i:05d}"} for i in range(area, symbols, 10)]
+        for area in range(min(symbols, 10))
+    }
+
+    history = YAHOO_CSV_HEADER + "".join(generate_history(rows, BENCHMARK_RUN_DATE))
+    with tempfile.TemporaryDirectory() as directory, FakeYahooServer(
+        default_history=history, latency=latency, error_rate=error_rate
+    ).serve() as server:
+        setup_file_path = f"{directory}/stocks_setup.json"
+        with open(setup_file_path, "w") as file:
+            json.dump(stock_setup, file)
+
+        # --- NOTE ---
+        # The scraper reads the setup and writes the store under the module paths, so they are pointed to the temporary
+        # directory for the time of the benchmark.
+        original_paths = (scraper_run.SETUP_STOCK_FILE_PATH, data.SCRAPED_STOCK_STORE_PATH)
+        scraper_run.SETUP_STOCK_FILE_PATH, data.SCRAPED_STOCK_STORE_PATH = setup_file_path, f"{directory}/stocks"
+        try:
+            start = time.perf_counter()
+            dead_letters = scraper_run.scrape(
+                BENCHMARK_RUN_DATE,
+                max_workers=max_workers,
+                base_url=server.base_url,
+                scheduler=RequestScheduler(rate=rate, burst=max_workers, max_concurrency=max_workers),
+            )
+            seconds = time.perf_counter() - start
+        finally:
+            scraper_run.SETUP_STOCK_FILE_PATH, data.SCRAPED_STOCK_STORE_PATH = original_paths
+
+    latencies = np.array(server.request_latencies)
+
+    return BenchmarkResult(
+        symbols=symbols,
+        seconds=seconds,
+        symbols_per_second=symbols / seconds,
+        bytes_per_second=server.bytes_sent / seconds,
+        peak_rss_bytes=get_peak_rss_bytes(),
+        p50_latency_seconds=float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        p99_latency_seconds=float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+        requests=len(latencies),
+        dead_letters=len(dead_letters),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks the scraper against a local fake yahoo endpoint.")
+    parser.add_argument("--symbols", type=int, nargs="+", default=DEFAULT_SYMBOL_COUNTS)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_SECONDS)
+    parser.add_argument("--rows", type=int, default=DEFAULT_HISTORY_ROWS)
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE)
+    parser.add_argument("--max-workers", type=int, default=scraper_run.DEFAULT_MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_SECOND)
+    args = parser.parse_args()
+
+    # --- NOTE ---
+    # Every benchmark runs in a fresh process, so that the peak rss of one does not hide the peak of the next one.
+    context = multiprocessing.get_context("spawn")
+    for symbols in args.symbols:
+        with context.Pool(1) as pool:
+            result = pool.apply(
+                run_benchmark,
+                (symbols, args.latency, args.rows, args.error_rate, args.max_workers, args.rate),
+            )
+        print(json.dumps(asdict(result)))
+
+
+if __name__ == "__main__":
+    main()
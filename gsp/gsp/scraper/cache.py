@@ -0,0 +1,70 @@
+import datetime
+import json
+from dataclasses import dataclass
+from typing import Any
+from lib.logger.setup import setup_logger
+from gsp.utils.disk_cache import DiskCache
+from gsp.scraper.download import download_stocks_history_from_yahoo_api
+from data import RESPONSE_CACHE_DIR_PATH
+
+logger = setup_logger(__name__)
+
+DEFAULT_RESPONSE_CACHE_TTL: datetime.timedelta = datetime.timedelta(days=1)
+DEFAULT_RESPONSE_CACHE_MAX_SIZE_BYTES: int = 512 * 1024 * 1024
+
+
+@dataclass
+class ResponseCache(DiskCache):
+    """A disk cache of the raw yahoo finance responses keyed by the stock id and the end of the requested period.
+    In the `offline` mode the histories are served only from the cache and a missing entry is an error.
+
+    The incremental downloads start at the watermark of the stock, which moves forward after every run
+    (but does not reach the end date on the days without trading). A cached response is therefore served
+    to any request it covers: a full history to every request, and an incremental one to the requests
+    starting at or after its start.
+    """
+
+    directory: str = RESPONSE_CACHE_DIR_PATH
+    ttl: datetime.timedelta | None = DEFAULT_RESPONSE_CACHE_TTL
+    max_size_bytes: int | None = DEFAULT_RESPONSE_CACHE_MAX_SIZE_BYTES
+    offline: bool = False
+
+    def get_covering(self, stock_id: str, end_date: datetime.date, start_date: datetime.date | None) -> str | None:
+        """Returns the cached response covering the period, the full history first."""
+        for kind in ["full", "incremental"] if start_date is not None else ["full"]:
+            cached = self.get(["yahoo", stock_id, end_date, kind])
+            if cached is None:
+                continue
+
+            entry = json.loads(cached)
+            if entry["start_date"] is None or (
+                start_date is not None and datetime.date.fromisoformat(entry["start_date"]) <= start_date
+            ):
+                return entry["data"]
+
+        return None
+
+    def download(
+        self,
+        stock_id: str,
+        end_date: datetime.date,
+        start_date: datetime.date | None = None,
+        **download_kwargs: Any,
+    ) -> str:
+        cached = self.get_covering(stock_id, end_date, start_date)
+        if cached is not None:
+            logger.info(f"Loaded yahoo finance history from cache: {stock_id}")
+            return cached
+
+        if self.offline:
+            raise Exception(f"History of {stock_id} until {end_date.isoformat()} is not cached (offline mode)")
+
+        data = download_stocks_history_from_yahoo_api(
+            stock_id=stock_id, end_date=end_date, start_date=start_date, **download_kwargs
+        )
+        entry = {"start_date": start_date.isoformat() if start_date is not None else None, "data": data}
+        self.set(
+            ["yahoo", stock_id, end_date, "full" if start_date is None else "incremental"], json.dumps(entry).encode()
+        )
+
+        return data
@@ -1,31 +1,116 @@
+import time
 import requests
 import datetime
+import contextlib
+from requests.adapters import HTTPAdapter
 from lib.logger.setup import setup_logger
+from gsp.scraper.scheduler import RequestScheduler, parse_retry_after
 
 logger = setup_logger()
 
+YAHOO_API_URL: str = "https://query1.finance.yahoo.com/v7/finance/download"
 
-def download_stocks_history_from_yahoo_api(stock_id: str, end_date: datetime.date) -> str:
-    url = f"https://query1.finance.yahoo.com/v7/finance/download/{stock_id}"
+DEFAULT_POOL_SIZE: int = 8
+DEFAULT_RETRIES: int = 3
+DEFAULT_BACKOFF_FACTOR: float = 0.5
+DEFAULT_TIMEOUT: float = 5.0
+RETRYABLE_STATUS_CODES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
 
-    response = requests.get(
-        url=url,
-        params={
-            "period1": "0",
-            "period2": int(datetime.datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).timestamp()),
-        },
-        headers={
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Creates a session that keeps up to `pool_size` keep-alive connections per host,
+    so that concurrent downloads reuse TCP/TLS connections instead of opening a new one per symbol.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {
             "Accept": "text/csv",
             "User-Agent": "Mozilla/5.0",
-        },
-        timeout=5,
+        }
     )
-    if response.status_code == 200:
-        data = response.text
-        logger.info(f"Downloaded yahoo finance history: {stock_id}")
-        return data
-
-    else:
-        raise Exception(
-            f"An error occurred while downloading {stock_id} stocks history. Status code: {response.status_code}"
-        )
+
+    return session
+
+
+def report_response(url: str, response: requests.Response, scheduler: RequestScheduler | None) -> float | None:
+    """Reports the response to the scheduler and returns the `Retry-After` time of a throttled response."""
+    if response.status_code not in RETRYABLE_STATUS_CODES:
+        if response.status_code == 200 and scheduler is not None:
+            scheduler.on_success(url)
+        return None
+
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if scheduler is not None:
+        scheduler.on_throttle(url, retry_after)
+
+    return retry_after
+
+
+def download_stocks_history_from_yahoo_api(
+    stock_id: str,
+    end_date: datetime.date,
+    start_date: datetime.date | None = None,
+    session: requests.Session | None = None,
+    base_url: str = YAHOO_API_URL,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    timeout: float = DEFAULT_TIMEOUT,
+    scheduler: RequestScheduler | None = None,
+) -> str:
+    """Downloads the stock history from the start date (or from the listing when omitted) to the end date as csv text.
+
+    Connection errors, timeouts and the `RETRYABLE_STATUS_CODES` are retried up to `retries` times,
+    waiting `backoff_factor * 2 ** attempt` seconds (or the `Retry-After` time when longer) before each retry.
+
+    When the `scheduler` is given every request waits for its slot and the throttled responses are reported to it.
+    """
+    url = f"{base_url}/{stock_id}"
+    requester = session or requests
+
+    for attempt in range(retries + 1):
+        retry_after = None
+        try:
+            with scheduler.slot(url) if scheduler is not None else contextlib.nullcontext():
+                response = requester.get(
+                    url=url,
+                    params={
+                        "period1": str(
+                            int(datetime.datetime(start_date.year, start_date.month, start_date.day).timestamp())
+                            if start_date is not None
+                            else 0
+                        ),
+                        "period2": str(
+                            int(datetime.datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59).timestamp())
+                        ),
+                    },
+                    headers={
+                        "Accept": "text/csv",
+                        "User-Agent": "Mozilla/5.0",
+                    },
+                    timeout=timeout,
+                )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if scheduler is not None:
+                scheduler.on_throttle(url)
+            if attempt == retries:
+                raise
+            logger.warning(f"Request for {stock_id} failed ({e.__class__.__name__}), retrying...")
+        else:
+            retry_after = report_response(url, response, scheduler)
+            if response.status_code == 200:
+                data = response.text
+                logger.info(f"Downloaded yahoo finance history: {stock_id}")
+                return data
+
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                raise Exception(
+                    f"An error occurred while downloading {stock_id} stocks history. Status code: {response.status_code}"
+                )
+            logger.warning(f"Request for {stock_id} returned status code {response.status_code}, retrying...")
+
+        time.sleep(max(backoff_factor * 2**attempt, retry_after or 0.0))
+
+    raise Exception(f"An error occurred while downloading {stock_id} stocks history.")
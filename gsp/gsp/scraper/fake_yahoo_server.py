@@ -0,0 +1,116 @@
+import time
+import bisect
+import random
+import datetime
+import threading
+import contextlib
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Set, Tuple
+
+YAHOO_CSV_HEADER: str = "Date,Open,High,Low,Close,Adj Close,Volume\n"
+
+
+@lru_cache(maxsize=128)
+def split_history(history: str) -> Tuple[str, List[str], List[str]]:
+    """Returns the header, the rows and the dates of the rows of a csv history sorted by the date."""
+    header, *rows = history.splitlines(keepends=True)
+    return header, rows, [row[:10] for row in rows]
+
+
+def filter_history(history: str, period1: int | None = None, period2: int | None = None) -> str:
+    """Returns the csv history (sorted by the date) of the rows within the period given as the yahoo timestamps."""
+    header, rows, dates = split_history(history)
+    start = bisect.bisect_left(dates, datetime.date.fromtimestamp(period1).isoformat()) if period1 is not None else 0
+    end = bisect.bisect_right(dates, datetime.date.fromtimestamp(period2).isoformat()) if period2 is not None else None
+
+    return header + "".join(rows[start:end])
+
+
+@dataclass
+class FakeYahooServer:
+    """Local http server imitating the yahoo finance download endpoint.
+
+    Every symbol is served its history set in `histories` (or the `default_history`) filtered to the requested period,
+    after waiting `latency` seconds. The next requests of a symbol fail with the status codes given to `fail`
+    (a 429 with the `retry_after` header when it is set), and a share of `error_rate` of the other requests fails
+    with 503 (retryable). The requested symbols, the client connections, the bytes sent and the request latencies
+    are recorded.
+    """
+
+    default_history: str = YAHOO_CSV_HEADER
+    histories: Dict[str, str] = field(default_factory=dict)
+    latency: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    retry_after: str | None = None
+    failures: Dict[str, List[int]] = field(default_factory=dict)
+    base_url: str = ""
+    requests: List[str] = field(default_factory=list)
+    connections: Set[Tuple[str, int]] = field(default_factory=set)
+    bytes_sent: int = 0
+    request_latencies: List[float] = field(default_factory=list)
+
+    def fail(self, stock_id: str, *status_codes: int) -> None:
+        """Makes the next requests for the stock return the given status codes before succeeding."""
+        self.failures[stock_id] = list(status_codes)
+
+    def get_status_code(self, stock_id: str, rng: random.Random) -> int:
+        pending = self.failures.get(stock_id, [])
+        if pending:
+            return pending.pop(0)
+
+        return 503 if rng.random() < self.error_rate else 200
+
+    @contextlib.contextmanager
+    def serve(self) -> Iterator["FakeYahooServer"]:
+        rng = random.Random(self.seed)
+        lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                start = time.perf_counter()
+                url = urlparse(self.path)
+                stock_id = url.path.rsplit("/", 1)[-1]
+                params = {key: int(value[0]) for key, value in parse_qs(url.query).items()}
+                with lock:
+                    server.requests.append(stock_id)
+                    server.connections.add(self.client_address)
+                    status_code = server.get_status_code(stock_id, rng)
+
+                time.sleep(server.latency)
+                history = server.histories.get(stock_id, server.default_history)
+                body = (
+                    filter_history(history, params.get("period1"), params.get("period2"))
+                    if status_code == 200
+                    else "error"
+                ).encode()
+
+                self.send_response(status_code)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("Content-Length", str(len(body)))
+                if status_code == 429 and server.retry_after is not None:
+                    self.send_header("Retry-After", server.retry_after)
+                self.end_headers()
+                self.wfile.write(body)
+                with lock:
+                    server.bytes_sent += len(body)
+                    server.request_latencies.append(time.perf_counter() - start)
+
+            def log_message(self, format, *args):
+                pass
+
+        http_server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        self.base_url = f"http://127.0.0.1:{http_server.server_address[1]}/v7/finance/download"
+        try:
+            yield self
+        finally:
+            http_server.shutdown()
+            http_server.server_close()
@@ -1,19 +1,166 @@
 import io
 import json
 import datetime
+import numpy as np
 import pandas as pd
+from typing import Any, Dict, Hashable, List, Tuple, TypeAlias
+from concurrent.futures import ThreadPoolExecutor
 from lib.logger.setup import setup_logger
-from gsp.scraper.download import download_stocks_history_from_yahoo_api
+from gsp.scraper.cache import ResponseCache
+from gsp.scraper.scheduler import RequestScheduler
+from gsp.scraper.download import YAHOO_API_URL, create_session, download_stocks_history_from_yahoo_api
 from data import (
     SETUP_STOCK_FILE_PATH,
     SETUP_STOCK_ALIAS,
-    SCRAPED_STOCK_FILE_PATH,
+    SETUP_STOCK_COMPANY_ALIAS,
+    load_scraped_stocks,
+    remove_scraped_stocks,
+    save_scraped_stocks,
 )
 
 logger = setup_logger()
 
+DEFAULT_MAX_WORKERS: int = 8
+DEFAULT_DEAD_LETTER_PASSES: int = 1
+SCRAPE_TASK_ALIAS: TypeAlias = Tuple[str, SETUP_STOCK_COMPANY_ALIAS, datetime.date | None]
+ADJUSTMENT_CHECK_COLUMNS: List[str] = ["close", "adj_close"]
+STOCKS_HISTORY_DTYPES: Dict[Hashable, str] = {
+    "Date": "period[D]",
+    "Open": "float64",
+    "High": "float64",
+    "Low": "float64",
+    "Close": "float64",
+    "Adj Close": "float64",
+    "Volume": "Int64",
+}
 
-def scrape(run_date: datetime.date):
+
+def get_setup_dtypes(stock_setup: SETUP_STOCK_ALIAS) -> Dict[str, pd.CategoricalDtype]:
+    """Returns the categorical types of the constant columns shared by all the configured stocks,
+    so that the histories of different stocks can be concatenated without falling back to objects.
+    """
+    stock_companies = [stock_company for area in stock_setup for stock_company in stock_setup[area]]
+
+    return {
+        "area": pd.CategoricalDtype(list(stock_setup)),
+        "symbol": pd.CategoricalDtype([stock_company["stock_id"] for stock_company in stock_companies]),
+        "company": pd.CategoricalDtype(
+            list(dict.fromkeys(stock_company["company_name"] for stock_company in stock_companies))
+        ),
+    }
+
+
+def parse_stocks_history(
+    data: str,
+    area: str,
+    stock_company: SETUP_STOCK_COMPANY_ALIAS,
+    setup_dtypes: Dict[str, pd.CategoricalDtype] | None = None,
+) -> pd.DataFrame:
+    """Parses the csv history into the final column names and types in a single pass."""
+    df = pd.read_csv(io.StringIO(data), dtype=STOCKS_HISTORY_DTYPES)
+    df.columns = pd.Index([col.lower().replace(" ", "_") for col in df.columns])
+
+    # --- NOTE ---
+    # Handles random error where the rows contain null values
+    na_rows = df.isna().any(axis=1)
+    if na_rows.any():
+        df = df[~na_rows].copy()
+        logger.info(f"Removed {na_rows.sum()} rows with NaN values")
+    df["volume"] = df["volume"].astype("int64")
+
+    constants = {"area": area, "symbol": stock_company["stock_id"], "company": stock_company["company_name"]}
+    for column, value in constants.items():
+        dtype = setup_dtypes[column] if setup_dtypes is not None else pd.CategoricalDtype([value])
+        df[column] = pd.Series(value, index=df.index, dtype=dtype)
+
+    return df
+
+
+def get_watermarks(stored_df: pd.DataFrame) -> Dict[str, datetime.date]:
+    """Returns the date of the last stored row of every symbol."""
+    if stored_df.empty:
+        return {}
+
+    return {
+        str(symbol): date.to_timestamp().date()
+        for symbol, date in stored_df.groupby("symbol", observed=True)["date"].max().items()
+    }
+
+
+def is_history_adjusted(stored_df: pd.DataFrame, new_df: pd.DataFrame, watermark: datetime.date) -> bool:
+    """Checks whether the row at the watermark changed since it was stored.
+    A changed row means that yahoo has re-adjusted the history (e.g. after a split or a dividend)
+    and the whole stored history of the symbol is outdated.
+    """
+    watermark_period = pd.Period(watermark, freq="D")
+    stored_row = stored_df.loc[stored_df["date"] == watermark_period, ADJUSTMENT_CHECK_COLUMNS]
+    new_row = new_df.loc[new_df["date"] == watermark_period, ADJUSTMENT_CHECK_COLUMNS]
+
+    if stored_row.empty or new_row.empty:
+        return True
+
+    return not np.allclose(stored_row.to_numpy()[-1], new_row.to_numpy()[-1])
+
+
+def download_stocks_history(
+    area: str,
+    stock_company: SETUP_STOCK_COMPANY_ALIAS,
+    end_date: datetime.date,
+    start_date: datetime.date | None,
+    setup_dtypes: Dict[str, pd.CategoricalDtype],
+    cache: ResponseCache | None = None,
+    **download_kwargs: Any,
+) -> pd.DataFrame | None:
+    """Downloads and parses the history of a stock, returns None when the download fails."""
+    try:
+        data = (cache.download if cache is not None else download_stocks_history_from_yahoo_api)(
+            stock_id=stock_company["stock_id"], end_date=end_date, start_date=start_date, **download_kwargs
+        )
+        return parse_stocks_history(data, area, stock_company, setup_dtypes)
+    except Exception as e:
+        logger.error(f"Failed to download {stock_company['stock_id']}: {e}")
+        return None
+
+
+def save_stocks_history(
+    df: pd.DataFrame,
+    watermark: datetime.date | None,
+    is_stored: bool,
+    setup_dtypes: Dict[str, pd.CategoricalDtype],
+) -> bool:
+    """Saves the downloaded history of a stock, merging the rows after the watermark into the stored history.
+    Returns False when the stored history has been adjusted and the whole history has to be downloaded again.
+    """
+    symbol = str(df["symbol"].iloc[0]) if not df.empty else None
+    if watermark is not None and symbol is not None:
+        stored_df = load_scraped_stocks(symbols=[symbol]).astype(setup_dtypes)
+        if is_history_adjusted(stored_df, df, watermark):
+            logger.info(f"History of {symbol} has been adjusted since {watermark.isoformat()}, refreshing...")
+            return False
+
+        df = df[df["date"] > pd.Period(watermark, freq="D")]
+        logger.info(f"Downloaded {len(df)} new rows for {symbol}")
+        if df.empty:
+            return True
+        stored_df = stored_df.assign(area=df["area"].iloc[0], company=df["company"].iloc[0]).astype(setup_dtypes)
+        df = pd.concat([stored_df, df], axis=0, ignore_index=True)
+
+    if is_stored and symbol is not None:
+        remove_scraped_stocks([symbol])
+    save_scraped_stocks(df)
+
+    return True
+
+
+def scrape(
+    run_date: datetime.date,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    base_url: str = YAHOO_API_URL,
+    full_refresh: bool = False,
+    cache: ResponseCache | None = None,
+    scheduler: RequestScheduler | None = None,
+    dead_letter_passes: int = DEFAULT_DEAD_LETTER_PASSES,
+) -> List[str]:
     """
     The following code snippet has one aim: to download data that is used in the Machine Learning model.
     The data that is being downloaded is up-to-date meaning
@@ -22,46 +169,88 @@ def scrape(run_date: datetime.date):
     of a scheduler and provide the most recent data and predictions.
 
     The code snippet is a part of the run.py file that is located in the nsp/scraper directory.
+
+    The histories are downloaded concurrently by up to `max_workers` threads sharing one pooled keep-alive session.
+
+    Only the rows since the last stored date (the watermark) of every symbol are downloaded and merged into the stored
+    stocks, where only the partitions of the symbols with new rows are rewritten. The whole history of a symbol is
+    downloaded again when it is new, when its row at the watermark has changed (splits and other adjustments)
+    or when `full_refresh` is set.
+
+    When the `cache` is given the responses are served from it, and only the missing ones are downloaded.
+
+    The requests are paced by the `scheduler` (by default one adapting up to `max_workers` concurrent requests).
+    A stock that fails to download does not abort the run, it is put on a dead-letter list and retried
+    in up to `dead_letter_passes` later passes. The symbols still failing after them are returned.
     """
     stock_setup: SETUP_STOCK_ALIAS = json.load(open(SETUP_STOCK_FILE_PATH, "r"))
-    stock_data_df = pd.DataFrame()
-
-    for area in stock_setup:
-        for stock_company in stock_setup[area]:
-            data = download_stocks_history_from_yahoo_api(stock_id=stock_company["stock_id"], end_date=run_date)
-
-            data_types = {
-                "Date": "period[D]",
-                "Open": "float",
-                "High": "float",
-                "Low": "float",
-                "Close": "float",
-                "Volume": "int",
-            }
-            df = pd.read_csv(io.StringIO(data))
+    setup_dtypes = get_setup_dtypes(stock_setup)
+    stored_df = load_scraped_stocks(columns=["date", "symbol"])
+    stored_symbols = [str(symbol) for symbol in stored_df["symbol"].unique()] if not stored_df.empty else []
+    watermarks = get_watermarks(stored_df) if not full_refresh else {}
+
+    stock_companies: List[Tuple[str, SETUP_STOCK_COMPANY_ALIAS]] = [
+        (area, stock_company) for area in stock_setup for stock_company in stock_setup[area]
+    ]
+    configured_symbols = [stock_company["stock_id"] for _, stock_company in stock_companies]
+    remove_scraped_stocks([symbol for symbol in stored_symbols if symbol not in configured_symbols])
 
+    scheduler = scheduler or RequestScheduler(max_concurrency=max_workers)
+
+    with create_session(pool_size=max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def download(area: str, stock_company: SETUP_STOCK_COMPANY_ALIAS, start_date: datetime.date | None):
+            return download_stocks_history(
+                area,
+                stock_company,
+                run_date,
+                start_date,
+                setup_dtypes,
+                cache,
+                session=session,
+                base_url=base_url,
+                scheduler=scheduler,
+            )
+
+        def process(tasks: List[SCRAPE_TASK_ALIAS]) -> Tuple[List[SCRAPE_TASK_ALIAS], List[SCRAPE_TASK_ALIAS]]:
+            """Downloads and saves the histories, returns the tasks to be refreshed and the failed ones."""
+            to_refresh: List[SCRAPE_TASK_ALIAS] = []
+            failed: List[SCRAPE_TASK_ALIAS] = []
             # --- NOTE ---
-            # Handles random error where the rows contain null values
-            original_length = len(df)
-            df = df.dropna()
-            if len(df) < original_length:
-                logger.info(f"Removed {original_length - len(df)} rows with NaN values")
+            # Every history is saved as soon as it is downloaded, so only the histories in flight are kept in memory.
+            for (area, stock_company, watermark), df in zip(tasks, executor.map(lambda args: download(*args), tasks)):
+                if df is None:
+                    failed.append((area, stock_company, watermark))
+                elif not save_stocks_history(df, watermark, stock_company["stock_id"] in stored_symbols, setup_dtypes):
+                    to_refresh.append((area, stock_company, None))
 
-            df = df.astype(data_types)
+            return to_refresh, failed
 
-            df = df.rename(columns={col: col.lower().replace(" ", "_") for col in df.columns})
+        pending: List[SCRAPE_TASK_ALIAS] = [
+            (area, stock_company, watermarks.get(stock_company["stock_id"]))
+            for area, stock_company in stock_companies
+            if watermarks.get(stock_company["stock_id"], datetime.date.min) < run_date
+        ]
+        for dead_letter_pass in range(dead_letter_passes + 1):
+            if not pending:
+                break
+            if dead_letter_pass > 0:
+                logger.info(f"Retrying {len(pending)} failed stocks (pass {dead_letter_pass}/{dead_letter_passes})...")
 
-            df["area"] = area
-            df["symbol"] = stock_company["stock_id"]
-            df["company"] = stock_company["company_name"]
+            to_refresh, dead_letters = process(pending)
+            _, failed_refreshes = process(to_refresh)
+            pending = dead_letters + failed_refreshes
 
-            stock_data_df = pd.concat([stock_data_df, df], axis=0)
+    dead_letter_symbols = [stock_company["stock_id"] for _, stock_company, _ in pending]
+    if dead_letter_symbols:
+        logger.warning(f"Failed to download {len(dead_letter_symbols)} stocks: {', '.join(dead_letter_symbols)}")
 
-    stock_data_df.to_csv(SCRAPED_STOCK_FILE_PATH, index=False)
     logger.info("Stocks data saved successfully")
 
+    return dead_letter_symbols
+
 
 if __name__ == "__main__":
     run_date = datetime.date.today()
     # run_date = datetime.date(year=2024, month=1, day=1)
-    scrape(run_date)
+    scrape(run_date, cache=ResponseCache())
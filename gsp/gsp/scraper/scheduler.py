@@ -0,0 +1,128 @@
+import time
+import datetime
+import threading
+import contextlib
+import email.utils
+from urllib.parse import urlparse
+from dataclasses import dataclass, field
+from typing import Dict, Iterator
+from lib.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_RATE_PER_SECOND: float = 10.0
+DEFAULT_MIN_RATE_PER_SECOND: float = 0.5
+DEFAULT_BURST: int = 10
+DEFAULT_MAX_CONCURRENCY: int = 8
+MAX_RETRY_AFTER_SECONDS: float = 60.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Returns the number of seconds to wait from the `Retry-After` header given either as seconds or as a http date."""
+    if not value:
+        return None
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+
+@dataclass
+class TokenBucket:
+    """Allows `rate` requests per second on average and bursts of up to `capacity` requests.
+
+    NOTE: The bucket is not thread safe on its own, it is guarded by the lock of the scheduler.
+    """
+
+    rate: float
+    capacity: float
+    paused_until: float = 0.0
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False, default_factory=time.monotonic)
+
+    def __post_init__(self):
+        self.tokens = self.capacity
+
+    def reserve(self) -> float:
+        """Takes a token and returns the number of seconds the caller has to wait before using it.
+        The tokens may go below zero, so that the waiting callers are spread evenly instead of waking up at once.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+
+        return max(0.0, -self.tokens / self.rate, self.paused_until - now)
+
+
+@dataclass
+class RequestScheduler:
+    """Schedules the requests of the concurrent downloads with a token bucket per host and an adaptive concurrency.
+
+    The concurrency and the rate of the host are halved on every throttled response (429, 5xx, timeouts)
+    and grow back slowly on the successful ones (additive increase, multiplicative decrease),
+    so that the downloads settle at the highest rate sustained by the server.
+    A `Retry-After` header pauses all the requests to the host for the given time.
+    """
+
+    rate: float = DEFAULT_RATE_PER_SECOND
+    min_rate: float = DEFAULT_MIN_RATE_PER_SECOND
+    burst: int = DEFAULT_BURST
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    concurrency: float = field(init=False)
+    active: int = field(init=False, default=0)
+    buckets: Dict[str, TokenBucket] = field(init=False, default_factory=dict)
+    condition: threading.Condition = field(init=False, repr=False, default_factory=threading.Condition)
+
+    def __post_init__(self):
+        self.concurrency = float(self.max_concurrency)
+
+    def get_bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(rate=self.rate, capacity=self.burst)
+
+        return self.buckets[host]
+
+    @contextlib.contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """Blocks until a request to the url is allowed by both the concurrency limit and the rate of the host."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.active < int(self.concurrency))
+            self.active += 1
+            wait = self.get_bucket(url).reserve()
+
+        try:
+            if wait > 0:
+                time.sleep(wait)
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
+
+    def on_success(self, url: str) -> None:
+        with self.condition:
+            bucket = self.get_bucket(url)
+            bucket.rate = min(self.rate, bucket.rate + self.min_rate)
+            self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            self.condition.notify_all()
+
+    def on_throttle(self, url: str, retry_after: float | None = None) -> None:
+        with self.condition:
+            bucket = self.get_bucket(url)
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+            self.concurrency = max(1.0, self.concurrency / 2)
+            if retry_after is not None:
+                bucket.paused_until = max(bucket.paused_until, time.monotonic() + retry_after)
+            logger.warning(
+                f"Throttled by {urlparse(url).netloc}, "
+                f"lowering the rate to {bucket.rate:.2f}/s and the concurrency to {int(self.concurrency)}"
+            )
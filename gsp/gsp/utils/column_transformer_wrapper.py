@@ -1,6 +1,10 @@
-from dataclasses import dataclass
+import os
+import pickle
+from dataclasses import dataclass, field
 from typing import Any, List, Literal, Tuple
+import numpy as np
 import pandas as pd
+from scipy import sparse as sp
 from sklearn.compose import ColumnTransformer
 
 
@@ -9,17 +13,122 @@ class ColumnTransformerWrapper:
     """A class that wraps the ColumnTransformer from sklearn.compose.
     It transforms the pandas DataFrame and returns the transformed DataFrame.
 
+    The wrapper can be fitted once and then only transform the later data (e.g. the inference or backtest rows),
+    and it can be saved to and loaded from a file with the fitted encoders.
+
+    When the `dtype` is given the transformed values are cast to it, so that the encoders mixing types
+    do not leave an object typed DataFrame behind.
+
+    When `sparse` is set the output of the sparse encoders (e.g. the one-hot encoding) is kept sparse,
+    and the whole DataFrame is returned with sparse columns. The estimators of sklearn and XGBoost receive it
+    as a sparse matrix, where XGBoost treats the entries absent from the matrix as missing values.
+    Every value of the passthrough columns is stored (including the zeros), so that only the zeros of the encoders
+    are absent and a numeric 0.0 is not read as missing.
+
     NOTE: The wrapper will change the names of the columns after transformation.
     """
 
     transformers: List[Tuple[str, Any, List[str]]]
     remainder: Literal["drop", "passthrough"] = "passthrough"
+    dtype: Any | None = None
+    sparse: bool = False
+    column_transformer: ColumnTransformer | None = field(init=False, default=None, repr=False)
 
-    def fit_transform(self, X: pd.DataFrame, y: Any | None = None) -> pd.DataFrame:  # type: ignore
-        ct = ColumnTransformer(self.transformers, remainder=self.remainder)
+    @property
+    def is_fitted(self) -> bool:
+        return self.column_transformer is not None
 
-        return pd.DataFrame(
-            ct.fit_transform(X, y),  # type: ignore
-            index=X.index,
-            columns=ct.get_feature_names_out(),
+    def create_column_transformer(self) -> ColumnTransformer:
+        return ColumnTransformer(
+            self.transformers,
+            remainder=self.remainder,
+            sparse_threshold=1.0 if self.sparse else 0.0,
         )
+
+    def get_feature_names_out(self) -> List[str]:
+        if self.column_transformer is None:
+            raise Exception("The column transformer has to be fitted before getting its columns")
+
+        return list(self.column_transformer.get_feature_names_out())
+
+    def store_passthrough_values(self, values: Any, X: pd.DataFrame) -> Any:
+        """Replaces the passthrough columns of the sparse output by the matrix storing all of their values."""
+        if not sp.issparse(values):
+            return values
+
+        remainder = self.column_transformer.output_indices_.get("remainder")  # type: ignore
+        if remainder is None or remainder.start == remainder.stop:
+            return values
+
+        # --- NOTICE --- The remainder columns are given by their positions or by their names (newer sklearn)
+        _, _, remainder_columns = self.column_transformer.transformers_[-1]  # type: ignore
+        names = [
+            X.columns[int(column)] if isinstance(column, (int, np.integer)) else column for column in remainder_columns
+        ]
+        passthrough = X[names].to_numpy(dtype="float64", na_value=np.nan)
+        rows, columns = passthrough.shape
+        stored = sp.csr_matrix(
+            (passthrough.ravel(), (np.repeat(np.arange(rows), columns), np.tile(np.arange(columns), rows))),
+            shape=passthrough.shape,
+        )
+        values = values.tocsc()
+
+        return sp.hstack((values[:, : remainder.start], stored, values[:, remainder.stop :]), format="csr")
+
+    def to_frame(self, values: Any, X: pd.DataFrame) -> pd.DataFrame:
+        columns = self.get_feature_names_out()
+        values = self.store_passthrough_values(values, X)
+        index = X.index
+        if self.dtype is not None:
+            values = values.astype(self.dtype)
+
+        if sp.issparse(values):
+            return pd.DataFrame.sparse.from_spmatrix(values, index=index, columns=columns)  # type: ignore
+
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    def fit(self, X: pd.DataFrame, y: Any | None = None) -> "ColumnTransformerWrapper":
+        self.column_transformer = self.create_column_transformer()
+        self.column_transformer.fit(X, y)
+
+        return self
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        if self.column_transformer is None:
+            raise Exception("The column transformer has to be fitted before transforming")
+
+        return self.to_frame(self.column_transformer.transform(X), X)
+
+    def fit_transform(self, X: pd.DataFrame, y: Any | None = None) -> pd.DataFrame:  # type: ignore
+        self.column_transformer = self.create_column_transformer()
+
+        return self.to_frame(self.column_transformer.fit_transform(X, y), X)
+
+    def save(self, file_path: str) -> None:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file_path: str) -> "ColumnTransformerWrapper":
+        with open(file_path, "rb") as file:
+            wrapper = pickle.load(file)
+
+        if not isinstance(wrapper, ColumnTransformerWrapper):
+            raise Exception(f"The file {file_path} does not contain a column transformer wrapper")
+
+        return wrapper
+
+
+def drop_missing_rows(X: pd.DataFrame) -> pd.DataFrame:
+    """Drops the rows with missing values like `X.dropna()`, but reads the missing values of a DataFrame
+    with only sparse columns from its stored entries instead of checking it row by row.
+    """
+    if len(X.columns) == 0 or not all(isinstance(dtype, pd.SparseDtype) for dtype in X.dtypes):
+        return X.dropna()
+
+    coo = X.sparse.to_coo()  # type: ignore
+    missing = np.zeros(len(X), dtype=bool)
+    missing[coo.row[np.isnan(coo.data)]] = True
+
+    return X[~missing]
@@ -0,0 +1,32 @@
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_integer_dtype, is_object_dtype
+
+COMPACT_FLOAT_DTYPE: str = "float32"
+
+
+def make_compact_dtypes(df: pd.DataFrame, float_dtype: str = COMPACT_FLOAT_DTYPE) -> pd.DataFrame:
+    """Casts the columns to the compact types: the floats to `float_dtype`, the integers to the smallest integer type
+    holding their values and the strings to categories (stored as integer codes).
+
+    NOTE: The index is kept as it is, the levels of a MultiIndex are already stored once and referenced by small codes.
+    """
+    dtypes: Dict[str, Any] = {}
+    for column in df.columns:
+        dtype = df[column].dtype
+        if is_float_dtype(dtype) and dtype != np.dtype(float_dtype):
+            dtypes[column] = float_dtype
+        elif is_integer_dtype(dtype) and not is_bool_dtype(dtype) and isinstance(dtype, np.dtype):
+            dtypes[column] = pd.to_numeric(df[column], downcast="integer").dtype
+        elif is_object_dtype(dtype):
+            dtypes[column] = "category"
+
+    return df.astype(dtypes)
+
+
+def get_memory_usage_mb(df: pd.DataFrame | pd.Series) -> float:
+    """Returns the memory taken by the values and the index in megabytes."""
+    memory_usage = df.memory_usage(deep=True, index=True)
+
+    return float(memory_usage.sum() if isinstance(memory_usage, pd.Series) else memory_usage) / 2**20
@@ -1,4 +1,78 @@
 import datetime
+from dataclasses import dataclass, field
+from typing import List
+import numpy as np
+
+DEFAULT_CALENDAR_START: datetime.date = datetime.date(1970, 1, 1)
+DEFAULT_CALENDAR_END: datetime.date = datetime.date(2100, 12, 31)
+TRADING_WEEKMASK: str = "1111100"
+
+
+@dataclass
+class TradingCalendar:
+    """A calendar of the trading days (the week days except for the `holidays`).
+
+    The trading days between `start` and `end` are precomputed once together with the ordinal of the last trading day
+    on or before every calendar day, so shifting a date by `n` trading days is a lookup in these arrays
+    and whole arrays of dates and offsets are shifted at once. The dates out of the range are shifted
+    by `np.busday_offset` with the same calendar.
+    """
+
+    holidays: List[datetime.date] = field(default_factory=list)
+    start: datetime.date = DEFAULT_CALENDAR_START
+    end: datetime.date = DEFAULT_CALENDAR_END
+    busdaycalendar: np.busdaycalendar = field(init=False, repr=False)
+    trading_days: np.ndarray = field(init=False, repr=False)
+    ordinals: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.busdaycalendar = np.busdaycalendar(
+            weekmask=TRADING_WEEKMASK, holidays=np.array(self.holidays, dtype="datetime64[D]")
+        )
+        days = np.arange(np.datetime64(self.start, "D"), np.datetime64(self.end, "D") + 1)
+        is_trading_day = np.is_busday(days, busdaycal=self.busdaycalendar)
+        self.trading_days = days[is_trading_day]
+        self.ordinals = np.cumsum(is_trading_day) - 1
+
+    def get_previous_dates(self, dates: np.ndarray | datetime.date, n: np.ndarray | int) -> np.ndarray:
+        """Returns the `n`th trading days before the dates (after them for the negative `n`) as `datetime64[D]`,
+        broadcasting the dates against the offsets. The dates falling on non-trading days are first rolled back
+        to the previous trading day.
+        """
+        dates, n = np.broadcast_arrays(np.asarray(dates, dtype="datetime64[D]"), np.asarray(n, dtype=int))
+        shape = dates.shape
+        dates, n = dates.ravel(), n.ravel()
+        days = (dates - np.datetime64(self.start, "D")).astype(int)
+        in_range = (days >= 0) & (days < len(self.ordinals))
+        ordinals = self.ordinals[np.where(in_range, days, 0)]
+        positions = ordinals - n
+        in_range &= (ordinals >= 0) & (positions >= 0) & (positions < len(self.trading_days))
+
+        previous_dates = self.trading_days[np.where(in_range, positions, 0)]
+        if not in_range.all():
+            previous_dates[~in_range] = np.busday_offset(
+                dates[~in_range], -n[~in_range], roll="backward", busdaycal=self.busdaycalendar
+            )
+
+        return previous_dates.reshape(shape)
+
+    def get_previous_date(self, n: int, date: datetime.date) -> datetime.date:
+        return self.get_previous_dates(date, n).item()
+
+    def get_trading_days(self, start: datetime.date, end: datetime.date) -> np.ndarray:
+        """Returns the trading days between the dates (both included) as `datetime64[D]`."""
+        if start < self.start or end > self.end:
+            days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+            return days[np.is_busday(days, busdaycal=self.busdaycalendar)]
+
+        return self.trading_days[
+            np.searchsorted(self.trading_days, np.datetime64(start, "D")) : np.searchsorted(
+                self.trading_days, np.datetime64(end, "D"), side="right"
+            )
+        ]
+
+
+DEFAULT_TRADING_CALENDAR: TradingCalendar = TradingCalendar()
 
 
 def get_nth_previous_working_date(n: int, date: datetime.date = datetime.date.today()) -> datetime.date:
@@ -16,28 +90,4 @@ def get_nth_previous_working_date(n: int, date: datetime.date = datetime.date.to
         >>> get_nth_previous_working_date(7, datetime.date(2024, 5, 2))
         datetime.date(2024, 4, 23)
     """
-    if date.weekday() == 5:
-        date = date - datetime.timedelta(days=1)
-    elif date.weekday() == 6:
-        date = date - datetime.timedelta(days=2)
-    else:
-        added_days = 4 - date.weekday()
-        n += added_days
-        date = date + datetime.timedelta(days=added_days)
-
-    # --- NOTE ---
-    """
-    Funny enough, the logic is the same for both past and future dates.
-    It is needed to add 2 days for each week difference since we only want to consider business (week) days.
-    In case of past dates we need to add 2 days after each 5 days has passed because we start the data with a friday.
-    In case of future dates we need to add -2 days after each 5 days starting at -2 already because since the initial day to which
-    the date was moved is friday then any change will result in moving the days by -2 step (2 forward).
-    Additionally since division is always rounded down we can use the // and it will by default set -1 for negative values.
-    Example:
-    1 // 5 = 0
-    -1 // 5 = -1
-    And this is the bahaviour that we want.
-    """
-    n += 2 * (n // 5)
-
-    return date - datetime.timedelta(days=n)
+    return DEFAULT_TRADING_CALENDAR.get_previous_date(n, date)
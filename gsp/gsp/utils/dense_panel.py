@@ -0,0 +1,99 @@
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+
+def get_fill_positions(missing: np.ndarray) -> np.ndarray:
+    """Returns for every cell of the (time x series) mask the row of the value filling it: the last preceding
+    non-missing row (forward fill) or, before the first one, the first non-missing row (backward fill).
+    The cells of the series without any value get -1.
+    """
+    rows = np.arange(missing.shape[0])[:, None]
+    previous = np.where(missing, -1, rows)
+    np.maximum.accumulate(previous, axis=0, out=previous)
+    following = np.where(missing, missing.shape[0], rows)[::-1]
+    np.minimum.accumulate(following, axis=0, out=following)
+    following = following[::-1]
+
+    positions = np.where(previous >= 0, previous, following)
+    positions[positions == missing.shape[0]] = -1
+
+    return positions
+
+
+def get_panel_codes(series: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Returns the codes of the values (-1 for the missing ones) and the values the codes point to."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def make_dense_panel(
+    df: pd.DataFrame,
+    dates: pd.PeriodIndex,
+    date_column: str = "date",
+    symbol_column: str = "symbol",
+) -> pd.DataFrame:
+    """Reindexes the rows to every date and symbol and fills the missing values along the dates of every symbol
+    (forward, then backward). The result is identical to reindexing the frame unstacked by the symbol,
+    `ffill`, `bfill` and stacking it back, sorted by the date and the symbol.
+
+    The rows are scattered into a dense (date x symbol) array of every column by the date ordinal
+    and the symbol code, so only the dense arrays and the final frame are allocated.
+    The rows of the dates out of `dates` are dropped and so are the symbols without any row left.
+    """
+    date_codes = dates.get_indexer(pd.PeriodIndex(df[date_column]))
+    symbol_codes, symbols = get_panel_codes(df[symbol_column])
+    rows = (date_codes >= 0) & (symbol_codes >= 0)
+    date_codes, symbol_codes = date_codes[rows], symbol_codes[rows]
+
+    # --- NOTE ---
+    # Only the symbols with rows are kept, in the order of their codes (the categories or the sorted values).
+    observed_codes = np.flatnonzero(np.bincount(symbol_codes, minlength=len(symbols)))
+    symbol_positions = np.full(len(symbols), -1)
+    symbol_positions[observed_codes] = np.arange(len(observed_codes))
+    cells = date_codes * len(observed_codes) + symbol_positions[symbol_codes]
+    shape = (len(dates), len(observed_codes))
+
+    if np.bincount(cells, minlength=shape[0] * shape[1]).max(initial=0) > 1:
+        raise ValueError("Index contains duplicate entries, cannot reshape")
+
+    columns: Dict[str, pd.Series | np.ndarray | pd.Categorical] = {}
+    for column in df.columns.drop([date_column, symbol_column]):
+        series = df[column][rows]
+        is_numeric = is_numeric_dtype(series.dtype) and not is_bool_dtype(series.dtype)
+        if is_numeric:
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            missing_values = np.isnan(values)
+        else:
+            values, uniques = get_panel_codes(series)
+            missing_values = values < 0
+
+        missing = np.ones(shape, dtype=bool)
+        missing.flat[cells] = missing_values
+        dense = np.full(shape, np.nan if is_numeric else -1, dtype="float64" if is_numeric else values.dtype)
+        dense.flat[cells] = values
+        positions = get_fill_positions(missing)
+        filled = np.take_along_axis(dense, np.maximum(positions, 0), axis=0).ravel()
+        filled[positions.ravel() < 0] = np.nan if is_numeric else -1
+
+        if is_numeric:
+            columns[column] = filled if missing.any() else filled.astype(series.dtype)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            columns[column] = pd.Categorical.from_codes(filled, dtype=series.dtype)  # type: ignore
+        else:
+            columns[column] = take(uniques.to_numpy(dtype=object), filled, allow_fill=True)
+
+    if isinstance(df[symbol_column].dtype, pd.CategoricalDtype):
+        symbols = pd.CategoricalIndex(symbols, dtype=df[symbol_column].dtype)
+    index = pd.MultiIndex(
+        levels=[dates, symbols],  # type: ignore
+        codes=[np.repeat(np.arange(shape[0]), shape[1]), np.tile(observed_codes, shape[0])],  # type: ignore
+        names=[date_column, symbol_column],
+    )
+
+    return pd.DataFrame(columns, index=index)
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import datetime
+from dataclasses import dataclass
+from typing import Any, List, Tuple
+from lib.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class DiskCache:
+    """A content-addressed cache of byte values on the disk.
+    Every entry is stored in a file named after the hash of its key, so any json serializable key can be used.
+
+    Entries older than `ttl` are treated as missing and removed. When the total size of the entries
+    exceeds `max_size_bytes` the least recently used entries are evicted.
+
+    NOTE: The writes are atomic (write to a temporary file and rename), so the cache can be shared between threads.
+    """
+
+    directory: str
+    ttl: datetime.timedelta | None = None
+    max_size_bytes: int | None = None
+
+    def __post_init__(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, key: Any) -> str:
+        digest = hashlib.sha256(json.dumps(key, default=str, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def is_expired(self, path: str) -> bool:
+        return self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl.total_seconds()
+
+    def get(self, key: Any) -> bytes | None:
+        path = self.get_path(key)
+        try:
+            if self.is_expired(path):
+                os.remove(path)
+                return None
+
+            with open(path, "rb") as file:
+                value = file.read()
+
+            # --- NOTE ---
+            # The access time is set explicitly since file systems are often mounted with noatime/relatime.
+            # The modification time is kept as it marks the time of the entry creation used by the ttl.
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: Any, value: bytes) -> None:
+        path = self.get_path(key)
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(value)
+        os.replace(temporary_path, path)
+
+        self.evict()
+
+    def delete(self, key: Any) -> None:
+        try:
+            os.remove(self.get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for path, _, _ in self.list_entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def list_entries(self) -> List[Tuple[str, float, int]]:
+        """Returns the path, the last access time and the size of every entry."""
+        entries: List[Tuple[str, float, int]] = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry.path, stat.st_atime, stat.st_size))
+
+        return entries
+
+    def evict(self) -> None:
+        entries = []
+        for path, access_time, size in self.list_entries():
+            try:
+                if self.is_expired(path):
+                    os.remove(path)
+                else:
+                    entries.append((path, access_time, size))
+            except FileNotFoundError:
+                continue
+
+        if self.max_size_bytes is None:
+            return
+
+        total_size = sum(size for _, _, size in entries)
+        for path, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                logger.info(f"Evicted {os.path.basename(path)} from {self.directory}")
+            except FileNotFoundError:
+                pass
+            total_size -= size
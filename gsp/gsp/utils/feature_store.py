@@ -0,0 +1,196 @@
+import os
+import json
+import shutil
+import hashlib
+import datetime
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+import numpy as np
+import pandas as pd
+from lib.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+FEATURES_DIR_NAME: str = "features"
+STATE_FILE_NAME: str = "state.parquet"
+META_FILE_NAME: str = "meta.json"
+DEFAULT_LOOKBACK: int = 5
+
+
+@dataclass
+class FeatureStore:
+    """A persisted frame of engineered features (indexed by date and symbol) that is extended day by day.
+
+    Next to the features it keeps the rolling state: the rows of the last `lookback` dates, which are built again
+    on every update to pick up the stocks that arrived late, preceded by the `tail_size` dates needed to build them
+    (e.g. the longest shift or moving window). The state keeps only the `columns` of the loaded stocks.
+    A daily update builds the features only from the state and the stocks loaded since it, so its cost depends
+    on the number of symbols and not on the length of the history.
+
+    The features are rebuilt from the whole history when the `config` or the symbols change, when the run date goes
+    back or when the loaded stocks before the `lookback` dates differ from the state (late or adjusted stocks).
+    """
+
+    directory: str
+    config: Dict[str, Any]
+    tail_size: int
+    columns: List[str]
+    lookback: int = DEFAULT_LOOKBACK
+
+    def get_fingerprint(self) -> str:
+        return hashlib.sha256(
+            json.dumps(
+                {"config": self.config, "tail_size": self.tail_size, "columns": self.columns}, sort_keys=True
+            ).encode()
+        ).hexdigest()
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load_meta(self) -> Dict[str, Any] | None:
+        try:
+            with open(self.get_path(META_FILE_NAME), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def load_features(self, months: List[int] | None = None) -> pd.DataFrame:
+        path = self.get_path(FEATURES_DIR_NAME)
+        if (months is not None and len(months) == 0) or not os.path.exists(path):
+            return pd.DataFrame()
+
+        df = pd.read_parquet(path, filters=[("month", "in", months)] if months is not None else None)
+
+        return df.drop(columns=["month"]).assign(date=df["date"].dt.to_period("D")).set_index(["date", "symbol"])
+
+    def save_features(self, features: pd.DataFrame) -> None:
+        """Replaces the monthly partitions of the features with the rows of the given features."""
+        df = features.reset_index()
+        df = df.assign(date=df["date"].dt.to_timestamp(), month=get_months(df["date"]))
+        df.to_parquet(
+            self.get_path(FEATURES_DIR_NAME),
+            partition_cols=["month"],
+            index=False,
+            existing_data_behavior="delete_matching",
+        )
+
+    def load_state(self) -> pd.DataFrame:
+        df = pd.read_parquet(self.get_path(STATE_FILE_NAME))
+        return df.assign(date=df["date"].dt.to_period("D"))
+
+    def save_state(self, features: pd.DataFrame, symbols: List[str], run_date: datetime.date) -> None:
+        """Saves the rows of the last `lookback` dates and the `tail_size` dates before them."""
+        dates = features.index.get_level_values("date")
+        state_dates = dates.unique().sort_values()[-(self.tail_size + self.lookback) :]
+        state = cast_frame(features.loc[dates >= state_dates.min()].reset_index()[self.columns])
+
+        state.assign(date=state["date"].dt.to_timestamp()).to_parquet(self.get_path(STATE_FILE_NAME), index=False)
+        with open(self.get_path(META_FILE_NAME), "w") as file:
+            json.dump(
+                {"fingerprint": self.get_fingerprint(), "symbols": sorted(symbols), "last_date": run_date.isoformat()},
+                file,
+            )
+
+    def rebuild(
+        self,
+        run_date: datetime.date,
+        symbols: List[str],
+        load_stocks: Callable[[datetime.date | None], pd.DataFrame],
+        build_features: Callable[[pd.DataFrame, datetime.date], pd.DataFrame],
+    ) -> pd.DataFrame:
+        logger.info("Building the features from the whole history...")
+        features = build_features(load_stocks(None), run_date)
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.save_features(features)
+        self.save_state(features, symbols, run_date)
+
+        return features
+
+    def update(
+        self,
+        run_date: datetime.date,
+        symbols: List[str],
+        load_stocks: Callable[[datetime.date | None], pd.DataFrame],
+        build_features: Callable[[pd.DataFrame, datetime.date], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Returns the features up to the run date, building only the rows of the dates since the last update
+        and of the `lookback` dates before it.
+
+        Args:
+            run_date (datetime.date): the last date of the features
+            symbols (List[str]): all the symbols of the stocks
+            load_stocks (Callable): loads the stocks rows from the given date (or the whole history for None)
+            build_features (Callable): builds the features from the stocks rows up to the run date
+        """
+        meta = self.load_meta()
+        if (
+            meta is None
+            or meta["fingerprint"] != self.get_fingerprint()
+            or meta["symbols"] != sorted(symbols)
+            or run_date < datetime.date.fromisoformat(meta["last_date"])
+        ):
+            return self.rebuild(run_date, symbols, load_stocks, build_features)
+
+        state = self.load_state()
+        state_dates = state["date"].drop_duplicates().sort_values()
+        recompute_from = state_dates.iloc[-self.lookback :].min()
+        stocks = load_stocks(state_dates.min().to_timestamp().date())
+        stocks = stocks[stocks["date"] <= pd.Period(run_date, freq="D")]
+        if is_state_outdated(state[state["date"] < recompute_from], stocks[stocks["date"] < recompute_from]):
+            logger.info("The stocks have changed since the features were stored, rebuilding...")
+            return self.rebuild(run_date, symbols, load_stocks, build_features)
+
+        categorical_columns = [
+            column for column in self.columns if isinstance(stocks[column].dtype, pd.CategoricalDtype)
+        ]
+        new_stocks = pd.concat(
+            [state[state["date"] < recompute_from], cast_frame(stocks[stocks["date"] >= recompute_from][self.columns])],
+            axis=0,
+            ignore_index=True,
+        ).astype({column: "category" for column in categorical_columns})
+        new_features = build_features(new_stocks, run_date)
+        new_features = new_features.loc[new_features.index.get_level_values("date") >= recompute_from]
+        logger.info(f"Built the features of {len(new_features)} rows since {recompute_from}")
+
+        # --- NOTE ---
+        # Only the monthly partitions of the rebuilt dates are rewritten.
+        months = sorted(set(get_months(new_features.index.get_level_values("date").to_series())))
+        stored_features = self.load_features(months)
+        if not stored_features.empty:
+            stored_features = stored_features.loc[stored_features.index.get_level_values("date") < recompute_from]
+        self.save_features(pd.concat([stored_features, new_features], axis=0))
+
+        features = self.load_features().sort_index()
+        self.save_state(features, symbols, run_date)
+
+        return features
+
+
+def get_months(dates: pd.Series) -> pd.Series:
+    """Returns the months of the dates as `yyyymm` numbers used to partition the features."""
+    return dates.dt.year * 100 + dates.dt.month
+
+
+def cast_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Casts the categorical columns to strings, so that the frames with different categories can be concatenated."""
+    return df.astype({column: str for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)})
+
+
+def is_state_outdated(state: pd.DataFrame, stocks: pd.DataFrame) -> bool:
+    """Checks whether the loaded stocks differ from the state of the same dates and symbols,
+    which means that the stocks have arrived late or have been adjusted since the features were stored.
+    """
+    compared = cast_frame(stocks[state.columns]).merge(
+        state, on=["date", "symbol"], how="inner", suffixes=("", "_state")
+    )
+    value_columns = [
+        column
+        for column in state.columns
+        if column not in ["date", "symbol"] and pd.api.types.is_numeric_dtype(state[column])
+    ]
+
+    return not all(
+        np.allclose(compared[column], compared[f"{column}_state"], equal_nan=True) for column in value_columns
+    )
@@ -1,19 +1,54 @@
-from typing import List, Literal, TypeAlias, cast
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Tuple, TypeAlias, cast
+import numpy as np
 import pandas as pd
+from pandas.api.extensions import take
+from pandas.api.types import is_extension_array_dtype
 
 MOVING_WINDOW_AGGREGATORS_ALIAS: TypeAlias = Literal["mean", "sum", "median", "std", "var", "min", "max"]
 
 
+def get_group_order(df: pd.DataFrame, groupby: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the positions of the rows ordered by their group (in the groupby order, keeping the order of the rows
+    within the groups) and the offsets of the groups in this ordering. The rows with missing keys are left out.
+    """
+    codes = df.groupby(groupby, observed=True).ngroup().to_numpy() if len(groupby) > 0 else np.zeros(len(df), int)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) > 0 else np.array([], int)
+
+    return order, starts
+
+
+def get_shifted_positions(starts: np.ndarray, length: int, shift: int) -> np.ndarray:
+    """Returns the position of the value shifted by `shift` rows to every position of the group ordered rows,
+    or -1 when the shift crosses the group boundary.
+    """
+    sizes = np.diff(np.r_[starts, length])
+    positions = np.arange(length)
+    source = positions - shift
+    group_starts = np.repeat(starts, sizes)
+
+    return np.where((source >= group_starts) & (source < group_starts + np.repeat(sizes, sizes)), source, -1)
+
+
 def make_shift_in_groups(
     df: pd.DataFrame,
     groupby: List[str] = [],
-    column: str = "",
+    column: List[str] | str = "",
     shift: List[int] | int = 1,
-    name: str | None = None,
+    name: List[str] | str | None = None,
 ) -> pd.DataFrame:
-    df = df.copy(deep=True)
-    if name is None:
-        name = column
+    """Shifts the columns within the groups, creating a `{name}_lag_{n}` or `{name}_lead_{n}` column for every shift.
+    The result is identical to `df.groupby(groupby)[column].shift(n)` (without the rows with missing keys)
+    sorted by the index.
+
+    The rows are ordered by their group once and every shift is a single `take` of the column values,
+    where the positions crossing the group boundaries are filled with the missing values.
+    """
+    columns = [column] if isinstance(column, str) else column
+    names = columns if name is None else [name] if isinstance(name, str) else name
 
     if isinstance(shift, int):
         shift = [shift]
@@ -23,22 +58,157 @@ def make_shift_in_groups(
     if len(shift) == 0:
         raise ValueError("Shift value must be non-zero!")
 
-    def create_shifted_columns(group):
-        shifted_group = pd.DataFrame(index=group.index)
-        for val in shift:
+    order, starts = get_group_order(df, groupby)
+    indexers = {}
+    for val in shift:
+        positions = get_shifted_positions(starts, len(order), val)
+        indexers[val] = np.where(positions >= 0, order[positions], -1)
+
+    shifted_columns = {}
+    for col, col_name in zip(columns, names):
+        series = df[col]
+        values = series.array if is_extension_array_dtype(series.dtype) else series.to_numpy()
+        for val, indexer in indexers.items():
+            shifted_columns[f"{col_name}_{'lead' if val < 0 else 'lag'}_{abs(val)}"] = take(
+                values, indexer, allow_fill=True
+            )
+
+    # --- NOTE ---
+    # The rows are kept in the group order before sorting, so that the rows with duplicated index values
+    # end up in the same order as after concatenating the groups.
+    return pd.DataFrame(shifted_columns, index=df.index[order]).sort_index()
+
+
+def cumsum_in_groups(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Returns the cumulative sums of the values restarted at every group start.
+
+    NOTE: Every group is accumulated separately (one numpy call per group, not per row), so that the sums
+    of one group do not carry the rounding errors of the magnitude of all the previous groups.
+    """
+    result = np.empty_like(values)
+    for start, end in zip(starts, np.r_[starts[1:], len(values)]):
+        np.cumsum(values[start:end], out=result[start:end])
+
+    return result
+
+
+@dataclass
+class GroupedRolling:
+    """Rolling windows over the values ordered by their group (see `get_group_order`), where the windows never cross
+    the group boundaries. It follows `Series.rolling` within every group, including the missing values
+    and the `min_periods`.
 
-            shifted_group[f"{name}_{'lead' if val < 0 else 'lag'}_{abs(val)}"] = group[column].shift(val)
+    The prefix sums (count, sum and sum of squares) are built once in O(n) and the sparse tables (min and max)
+    in O(n log w) for the longest window w, both are shared by all the windows, so every window is then computed
+    in O(n) regardless of its length. Other aggregators fall back to the pandas rolling.
 
-        return shifted_group
+    NOTE: The prefix sums are accumulated in extended precision over the values centered by their group mean,
+    so that the differences of the sums do not lose the precision of the variance.
+    """
 
-    shifted_df = cast(
-        pd.DataFrame,
-        df.groupby(groupby, observed=True, group_keys=False)
-        .apply(create_shifted_columns, include_groups=False)
-        .sort_index(),
-    )
+    values: np.ndarray
+    starts: np.ndarray
+    sparse_tables: Dict[str, np.ndarray] = field(init=False, default_factory=dict)
 
-    return shifted_df
+    def __post_init__(self):
+        self.values = self.values.astype("float64")
+        length = len(self.values)
+        sizes = np.diff(np.r_[self.starts, length])
+        self.group_starts = np.repeat(self.starts, sizes)
+        self.group_ends = np.repeat(np.r_[self.starts[1:], length] - 1, sizes)
+
+        observed = ~np.isnan(self.values)
+        filled = np.where(observed, self.values, 0.0)
+        if length > 0:
+            counts = np.add.reduceat(observed.astype("int64"), self.starts)
+            means = np.add.reduceat(filled, self.starts) / np.maximum(counts, 1)
+        else:
+            means = np.array([], "float64")
+        self.group_means = np.repeat(means, sizes)
+
+        centered = np.where(observed, filled - self.group_means, 0.0).astype(np.longdouble)
+        self.cumulative_counts = cumsum_in_groups(observed.astype("int64"), self.starts)
+        self.cumulative_sums = cumsum_in_groups(centered, self.starts)
+        self.cumulative_squares = cumsum_in_groups(centered**2, self.starts)
+
+    def sum_windows(self, cumulative: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+        """Returns the sums of the values from the first to the last position (empty when the last is before)."""
+        before = np.where(first > self.group_starts, cumulative[np.maximum(first - 1, 0)], 0)
+        return np.where(last >= first, cumulative[np.maximum(last, 0)] - before, 0)
+
+    def get_bounds(self, window: int, center: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the first and the last (inclusive) position of the window of every position."""
+        positions = np.arange(len(self.values))
+        last = positions + ((window - 1) // 2 if center else 0)
+        first = np.maximum(last - window + 1, self.group_starts)
+        last = np.minimum(last, self.group_ends)
+
+        return first, np.maximum(last, first - 1)
+
+    def get_sparse_table(self, aggregator: str, levels: int) -> np.ndarray:
+        """Returns the table of the minimums (or maximums) of the `2 ** level` values starting at every position.
+        The table is allocated once for the missing levels, which are filled in place.
+        """
+        table = self.sparse_tables.get(aggregator)
+        if table is not None and len(table) >= levels:
+            return table
+
+        reduce = np.fmin if aggregator == "min" else np.fmax
+        length = len(self.values)
+        grown = np.empty((levels, length), "float64")
+        if table is None:
+            grown[0] = self.values
+            filled = 1
+        else:
+            grown[: len(table)] = table
+            filled = len(table)
+        for level in range(filled, levels):
+            span = 2 ** (level - 1)
+            grown[level, length - span :] = np.nan
+            reduce(grown[level - 1, : length - span], grown[level - 1, span:], out=grown[level, : length - span])
+        self.sparse_tables[aggregator] = grown
+
+        return grown
+
+    def aggregate(
+        self, window: int, center: bool, min_periods: int, aggregator: MOVING_WINDOW_AGGREGATORS_ALIAS
+    ) -> np.ndarray:
+        if min_periods > window:
+            raise ValueError(f"min_periods {min_periods} must be <= window {window}")
+        if len(self.values) == 0:
+            return np.array([], "float64")
+        if aggregator not in ["mean", "sum", "std", "var", "min", "max"]:
+            return (
+                pd.Series(self.values)
+                .groupby(np.repeat(np.arange(len(self.starts)), np.diff(np.r_[self.starts, len(self.values)])))
+                .rolling(window=window, center=center, min_periods=min_periods)
+                .aggregate(aggregator)
+                .to_numpy()
+            )
+
+        first, last = self.get_bounds(window, center)
+        counts = self.sum_windows(self.cumulative_counts, first, last)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if aggregator in ["min", "max"]:
+                lengths = np.maximum(last - first + 1, 1)
+                levels = np.floor(np.log2(lengths)).astype("int64")
+                table = self.get_sparse_table(aggregator, int(levels.max()) + 1)
+                reduce = np.fmin if aggregator == "min" else np.fmax
+                result = reduce(table[levels, first], table[levels, np.maximum(last - 2**levels + 1, first)])
+            else:
+                sums = self.sum_windows(self.cumulative_sums, first, last)
+                if aggregator == "sum":
+                    result = (sums + counts * self.group_means).astype("float64")
+                elif aggregator == "mean":
+                    result = (sums / counts + self.group_means).astype("float64")
+                else:
+                    squares = self.sum_windows(self.cumulative_squares, first, last)
+                    variances = np.maximum((squares - sums**2 / counts) / (counts - 1), 0).astype("float64")
+                    result = np.where(counts > 1, variances, np.nan)
+                    result = np.sqrt(result) if aggregator == "std" else result
+
+        return np.where(counts >= min_periods, result, np.nan)
 
 
 def make_mw_in_groups(
@@ -51,7 +221,13 @@ def make_mw_in_groups(
     aggregator: List[MOVING_WINDOW_AGGREGATORS_ALIAS] | MOVING_WINDOW_AGGREGATORS_ALIAS = "mean",
     name: str | None = None,
 ) -> pd.DataFrame:
-    df = df.copy(deep=True)
+    """Creates a `{name}_lag_{aggregator}_{n}` column with the aggregate of the `n` previous values (without
+    the current one) for every positive window and a `{name}_lead_{aggregator}_{n}` column with the aggregate
+    of the `n` next values for every negative window, where the windows stay within the groups.
+
+    All the windows are computed in a single pass over the rows ordered by their group (see `GroupedRolling`),
+    the result matches the previous `groupby().apply()` of `Series.rolling` sorted by the index.
+    """
     if name is None:
         name = column
 
@@ -68,30 +244,25 @@ def make_mw_in_groups(
     if isinstance(aggregator, str):
         aggregator = cast(List[MOVING_WINDOW_AGGREGATORS_ALIAS], [aggregator]) * len(window)
 
-    def create_mw_columns(group):
-        ma_group = pd.DataFrame(index=group.index)
-        for index, val in enumerate(window):
-            type_name = "lag" if val > 0 else "lead"
-            if val < 0:
-                ma_group[f"{name}_{type_name}_{aggregator[index]}_{-val}"] = (
-                    group[column]
-                    .rolling(window=-val, center=center[index], min_periods=min_periods[index])
-                    .aggregate(aggregator[index])
-                    .shift(val)
-                )
-            else:
-                ma_group[f"{name}_{type_name}_{aggregator[index]}_{val}"] = (
-                    group[column]
-                    .shift(1)
-                    .rolling(window=val, center=center[index], min_periods=min_periods[index])
-                    .aggregate(aggregator[index])
-                )
-
-        return ma_group
-
-    return cast(
-        pd.DataFrame,
-        df.groupby(groupby, observed=True, group_keys=False)
-        .apply(create_mw_columns, include_groups=False)
-        .sort_index(),
-    )
+    order, starts = get_group_order(df, groupby)
+    values = df[column].to_numpy(dtype="float64", na_value=np.nan)[order]
+
+    # --- NOTE ---
+    # The lag windows aggregate the values shifted by one row, so that the current value is not included,
+    # the lead windows aggregate the values and shift the aggregate by the window length.
+    previous_positions = get_shifted_positions(starts, len(order), 1)
+    lag_rolling = GroupedRolling(np.where(previous_positions >= 0, values[previous_positions], np.nan), starts)
+    lead_rolling = GroupedRolling(values, starts)
+
+    mw_columns = {}
+    for index, val in enumerate(window):
+        type_name = "lag" if val > 0 else "lead"
+        rolling = lag_rolling if val > 0 else lead_rolling
+        aggregated = rolling.aggregate(abs(val), center[index], min_periods[index], aggregator[index])
+        if val < 0:
+            positions = get_shifted_positions(starts, len(order), val)
+            aggregated = np.where(positions >= 0, aggregated[positions], np.nan)
+
+        mw_columns[f"{name}_{type_name}_{aggregator[index]}_{abs(val)}"] = aggregated
+
+    return pd.DataFrame(mw_columns, index=df.index[order]).sort_index()
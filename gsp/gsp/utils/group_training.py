@@ -0,0 +1,92 @@
+import os
+from typing import Any, Callable, Dict, List
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+from sklearn.utils.parallel import Parallel, delayed
+from lib.logger.setup import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def get_n_workers(n_jobs: int) -> int:
+    """Returns the number of the worker processes for the `n_jobs` of joblib (-1 for all the cpus, -2 for all but one)."""
+    cpu_count = os.cpu_count() or 1
+    return max(1, min(cpu_count, cpu_count + 1 + n_jobs if n_jobs < 0 else n_jobs))
+
+
+def get_threads_per_worker(n_jobs: int) -> int:
+    """Returns the number of the threads every worker process can use without oversubscribing the cpus."""
+    return max(1, (os.cpu_count() or 1) // get_n_workers(n_jobs))
+
+
+def get_group_positions(index: pd.Index, level: str) -> Dict[Any, np.ndarray]:
+    """Returns the positions of the rows of every value of the index level, found in a single pass."""
+    codes, uniques = pd.factorize(index.get_level_values(level), sort=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+    return {uniques[i]: order[bounds[i] : bounds[i + 1]] for i in range(len(uniques)) if bounds[i] < bounds[i + 1]}
+
+
+def get_values(df: pd.DataFrame) -> Any:
+    """Returns the values of the DataFrame as a numpy array, or as a csr matrix when all its columns are sparse."""
+    if len(df.columns) > 0 and all(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes):
+        return sp.csr_matrix(df.sparse.to_coo())  # type: ignore
+
+    return df.to_numpy()
+
+
+def fit_predict_group(
+    create_model: Callable[[], Any],
+    X: Any,
+    y: np.ndarray,
+    X_query: Any,
+    positions: np.ndarray,
+    query_positions: np.ndarray,
+) -> np.ndarray:
+    model = create_model()
+    model.fit(X[positions], y[positions])
+
+    return np.asarray(model.predict(X_query[query_positions])).reshape(len(query_positions), -1)
+
+
+def fit_predict_groups(
+    create_model: Callable[[], Any],
+    X: pd.DataFrame,
+    y: pd.DataFrame,
+    X_query: pd.DataFrame,
+    level: str = "symbol",
+    n_jobs: int = -1,
+) -> pd.DataFrame:
+    """Trains a model for every value of the index level (e.g. every symbol) and predicts its rows of the query.
+
+    The rows are partitioned by the level once and every model is trained in one of `n_jobs` worker processes.
+    The arrays are passed to the workers once, as memory mapped files shared by all of them (joblib does it
+    for the large arrays), together with the positions of the rows of every group. The predictions are gathered
+    into a single frame at the end. The rows of the query without a trained group are dropped.
+
+    NOTE: The `create_model` has to be picklable (e.g. a `functools.partial`) and should limit the threads
+    of the model, see `get_threads_per_worker`.
+    """
+    if not y.index.equals(X.index):
+        y = y.reindex(X.index)
+
+    positions = get_group_positions(X.index, level)
+    query_positions = get_group_positions(X_query.index, level)
+    groups: List[Any] = [group for group in positions if group in query_positions]
+    logger.info(f"Training and predicting for {len(groups)} groups of {level} in {get_n_workers(n_jobs)} processes")
+
+    X_values, y_values, X_query_values = get_values(X), y.to_numpy(), get_values(X_query)
+    predictions = Parallel(n_jobs=n_jobs)(
+        delayed(fit_predict_group)(
+            create_model, X_values, y_values, X_query_values, positions[group], query_positions[group]
+        )
+        for group in groups
+    )
+
+    if len(groups) == 0:
+        return pd.DataFrame(columns=y.columns, index=X_query.index[:0], dtype="float64")
+
+    rows = np.concatenate([query_positions[group] for group in groups])
+    return pd.DataFrame(np.concatenate(predictions, axis=0), index=X_query.index[rows], columns=y.columns)
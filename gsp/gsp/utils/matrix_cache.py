@@ -0,0 +1,68 @@
+import os
+import pickle
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+from lib.logger.setup import setup_logger
+from gsp.utils.disk_cache import DiskCache
+from data import MATRIX_CACHE_DIR_PATH
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MATRIX_CACHE_MAX_SIZE_BYTES: int = 2 * 1024 * 1024 * 1024
+DEFAULT_MAX_MEMORY_ENTRIES: int = 8
+
+
+@dataclass
+class MatrixCache(DiskCache):
+    """A two-level cache of the built model inputs (e.g. the features or the X and y matrices).
+
+    The values are kept in memory for up to `max_memory_entries` least recently used keys, and pickled on the disk
+    (bounded by `max_size_bytes`), so that they are shared by the repeated runs of the same process
+    and by the later processes.
+
+    NOTE: The values served from memory are the same objects for every call, they must not be modified in place.
+    """
+
+    directory: str = MATRIX_CACHE_DIR_PATH
+    max_size_bytes: int | None = DEFAULT_MATRIX_CACHE_MAX_SIZE_BYTES
+    max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES
+    memory: OrderedDict[str, Any] = field(init=False, repr=False, default_factory=OrderedDict)
+
+    def remember(self, digest: str, value: Any) -> None:
+        self.memory[digest] = value
+        self.memory.move_to_end(digest)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_or_build(self, key: Any, build: Callable[[], T]) -> T:
+        """Returns the value of the key from memory or the disk, or builds and stores it when it is missing."""
+        digest = os.path.basename(self.get_path(key))
+        if digest in self.memory:
+            self.memory.move_to_end(digest)
+            return self.memory[digest]
+
+        cached = self.get(key)
+        if cached is not None:
+            logger.info(f"Loaded {digest[:12]} from {self.directory}")
+            value = pickle.loads(cached)
+        else:
+            value = build()
+            self.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+        self.remember(digest, value)
+
+        return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+        super().clear()
+
+
+@lru_cache(maxsize=None)
+def get_matrix_cache() -> MatrixCache:
+    """Returns the matrix cache shared by the process, its directory is created on the first call (not on import)."""
+    return MatrixCache(directory=MATRIX_CACHE_DIR_PATH)
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Literal, Tuple
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from scipy import sparse as sp
+from gsp.utils.group_training import get_values
+
+DEFAULT_MAX_BIN: int = 256
+
+
+def hstack(values: Any, columns: np.ndarray) -> Any:
+    """Appends the columns to the features, keeping the features sparse when they are."""
+    if sp.issparse(values):
+        return sp.hstack((values, columns), format="csr")
+
+    return np.hstack((values, columns))
+
+
+@dataclass
+class TrainingMatrices:
+    """The XGBoost training matrices of a dataset, quantized once and reused by every model trained on it
+    (e.g. the optuna trials and the repeated runs on the same split).
+
+    The matrices are built on the first use:
+    - direct: the features, shared by the models of all the horizons (the label is set before every training),
+      or one matrix per horizon (`shared=False`) for the models of the horizons trained at once
+    - chain: the features followed by the true values of the previous horizons, one matrix per horizon
+    - multi_output: the features with the labels of all the horizons
+
+    NOTE: The matrices are not pickled, every process builds its own on the first use.
+    The quantized matrices take roughly a byte per value, the chain keeps one of them per horizon.
+    """
+
+    X: pd.DataFrame
+    y: pd.DataFrame
+    max_bin: int = DEFAULT_MAX_BIN
+    matrices: Dict[Tuple[str, int], xgb.DMatrix] = field(init=False, repr=False, default_factory=dict)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {**self.__dict__, "matrices": {}}
+
+    def get_matrix(
+        self, strategy: Literal["chain", "direct", "multi_output"], horizon: int = 0, shared: bool = True
+    ) -> xgb.DMatrix:
+        """Returns the matrix of the model of the horizon (the position of the column of `y`).
+        The direct matrix is shared by the horizons unless `shared` is False.
+        """
+        key = (strategy, horizon if strategy == "chain" or (strategy == "direct" and not shared) else 0)
+        if key not in self.matrices:
+            values, y_values = get_values(self.X), self.y.to_numpy()
+            if strategy == "chain":
+                values = hstack(values, y_values[:, :horizon])
+
+            self.matrices[key] = xgb.QuantileDMatrix(
+                values, label=y_values if strategy == "multi_output" else None, max_bin=self.max_bin
+            )
+
+        matrix = self.matrices[key]
+        if strategy != "multi_output":
+            matrix.set_label(self.y.iloc[:, horizon].to_numpy())
+
+        return matrix
+
+
+def train_booster(hyper_params: Dict, matrix: xgb.DMatrix, max_bin: int = DEFAULT_MAX_BIN) -> xgb.Booster:
+    """Trains the booster with the native api, with the same parameters and rounds as the `XGBRegressor`."""
+    model = xgb.XGBRegressor(**{"max_bin": max_bin, **hyper_params})
+    if model.max_bin != max_bin:
+        raise ValueError(f"The matrices are quantized with {max_bin} bins, not {model.max_bin}")
+
+    return xgb.train(model.get_xgb_params(), matrix, num_boost_round=model.get_num_boosting_rounds())
+
+
+def predict_booster(booster: xgb.Booster, values: Any) -> np.ndarray:
+    return np.asarray(booster.inplace_predict(values))
@@ -0,0 +1,129 @@
+import datetime
+import os
+import pandas as pd
+import pytest
+from data import get_scraped_stocks_fingerprint, load_scraped_stocks, remove_scraped_stocks, save_scraped_stocks
+
+
+@pytest.fixture(autouse=True)
+def scraped_stock_store_path(tmp_path, monkeypatch) -> str:
+    store_path = str(tmp_path / "stocks")
+    monkeypatch.setattr("data.SCRAPED_STOCK_STORE_PATH", store_path)
+
+    return store_path
+
+
+def create_stocks(symbol: str, area: str, close: float) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.period_range("2024-05-20", periods=3, freq="D"),
+            "close": [close, close + 1, close + 2],
+            "volume": [100, 200, 300],
+            "area": area,
+            "symbol": symbol,
+            "company": symbol.lower(),
+        }
+    )
+
+
+def test_save_scraped_stocks_partitions_by_area_and_symbol(scraped_stock_store_path):
+    # --- ACT ---
+    save_scraped_stocks(pd.concat([create_stocks("AAPL", "AI", 1.0), create_stocks("EA", "gaming", 5.0)]))
+
+    # --- ASSERT ---
+    assert os.path.isdir(os.path.join(scraped_stock_store_path, "area=AI", "symbol=AAPL"))
+    assert os.path.isdir(os.path.join(scraped_stock_store_path, "area=gaming", "symbol=EA"))
+
+
+def test_save_scraped_stocks_replaces_only_saved_symbols():
+    # --- SETUP ---
+    save_scraped_stocks(pd.concat([create_stocks("AAPL", "AI", 1.0), create_stocks("EA", "gaming", 5.0)]))
+
+    # --- ACT ---
+    save_scraped_stocks(create_stocks("AAPL", "AI", 10.0))
+
+    # --- ASSERT ---
+    df = load_scraped_stocks(columns=["close", "symbol"])
+    assert len(df) == 6
+    assert list(df.loc[df["symbol"] == "AAPL", "close"]) == [10.0, 11.0, 12.0]
+    assert list(df.loc[df["symbol"] == "EA", "close"]) == [5.0, 6.0, 7.0]
+
+
+def test_load_scraped_stocks_projects_columns_and_filters_rows():
+    # --- SETUP ---
+    save_scraped_stocks(pd.concat([create_stocks("AAPL", "AI", 1.0), create_stocks("EA", "gaming", 5.0)]))
+
+    # --- ACT ---
+    df = load_scraped_stocks(
+        columns=["date", "symbol", "close"],
+        symbols=["EA"],
+        start_date=datetime.date(2024, 5, 21),
+        end_date=datetime.date(2024, 5, 21),
+    )
+
+    # --- ASSERT ---
+    assert list(df.columns) == ["date", "symbol", "close"]
+    assert list(df["date"]) == [pd.Period("2024-05-21", freq="D")]
+    assert list(df["symbol"].cat.categories) == ["EA"]
+    assert list(df["close"]) == [6.0]
+
+
+def test_load_scraped_stocks_returns_empty_frame_without_store():
+    # --- ACT ---
+    df = load_scraped_stocks(columns=["date", "close"])
+
+    # --- ASSERT ---
+    assert df.empty
+    assert list(df.columns) == ["date", "close"]
+
+
+def test_remove_scraped_stocks_removes_symbol_partitions():
+    # --- SETUP ---
+    save_scraped_stocks(pd.concat([create_stocks("AAPL", "AI", 1.0), create_stocks("EA", "gaming", 5.0)]))
+
+    # --- ACT ---
+    remove_scraped_stocks(["EA"])
+
+    # --- ASSERT ---
+    assert list(load_scraped_stocks(columns=["symbol"])["symbol"].unique()) == ["AAPL"]
+
+
+def test_load_scraped_stocks_returns_empty_frame_after_removing_every_symbol(scraped_stock_store_path):
+    # --- SETUP ---
+    save_scraped_stocks(pd.concat([create_stocks("AAPL", "AI", 1.0), create_stocks("EA", "gaming", 5.0)]))
+
+    # --- ACT ---
+    remove_scraped_stocks(["AAPL", "EA"])
+    df = load_scraped_stocks(columns=["date", "symbol"])
+
+    # --- ASSERT ---
+    assert not os.path.exists(scraped_stock_store_path)
+    assert df.empty
+    assert list(df.columns) == ["date", "symbol"]
+
+
+def test_load_scraped_stocks_returns_empty_frame_of_empty_store(scraped_stock_store_path):
+    # --- SETUP ---
+    os.makedirs(scraped_stock_store_path)
+
+    # --- ACT ---
+    df = load_scraped_stocks(columns=["date", "close"])
+
+    # --- ASSERT ---
+    assert df.empty
+    assert list(df.columns) == ["date", "close"]
+
+
+def test_scraped_stocks_fingerprint_changes_with_saved_stocks():
+    # --- SETUP ---
+    empty_fingerprint = get_scraped_stocks_fingerprint()
+    save_scraped_stocks(create_stocks("AAPL", "AI", 1.0))
+    saved_fingerprint = get_scraped_stocks_fingerprint()
+
+    # --- ACT ---
+    save_scraped_stocks(create_stocks("AAPL", "AI", 2.0))
+
+    # --- ASSERT ---
+    assert saved_fingerprint != empty_fingerprint
+    assert get_scraped_stocks_fingerprint() != saved_fingerprint
+    assert get_scraped_stocks_fingerprint() == get_scraped_stocks_fingerprint()
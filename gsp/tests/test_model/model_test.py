@@ -1,13 +1,23 @@
+import os
 import datetime
 import pytest
+import optuna
+import numpy as np
 import pandas as pd
 from gsp.model.model import (
     root_mean_squared_log_error,
     clean_data,
+    solve,
+    fit_predict_by_horizon,
+    optimize_with_optuna,
+    optuna_optimize_objective,
+    get_latest_rows,
     # engineer_features,
     # process_data,
     # split_data,
-    # create_model,
+    create_model,
+    get_column_transformer,
+    get_model_inputs,
 )
 
 
@@ -55,3 +65,194 @@ def test_clean_data_no_missing_business_days():
     cleaned_data = clean_data(data, run_date=datetime.date(2024, 5, 22))
     cleaned_data_dates = cleaned_data.index.get_level_values("date").unique()
     assert wednesday in cleaned_data_dates
+
+
+@pytest.mark.parametrize("strategy", ["chain", "direct", "multi_output"])
+def test_solve_predicts_every_horizon_with_strategy(strategy):
+    # --- SETUP ---
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [pd.period_range("2024-01-01", periods=40, freq="D"), ["AAPL", "GOOGL"]], names=["date", "symbol"]
+    )
+    X = pd.DataFrame({"close": rng.uniform(1, 10, len(index))}, index=index)
+    y = pd.DataFrame({f"close_lead_{i}": X["close"] * (1 + i / 100) for i in range(1, 4)})
+
+    # --- ACT ---
+    y_pred = solve({"n_estimators": 10}, X, y, X.tail(4), strategy=strategy)
+
+    # --- ASSERT ---
+    assert y_pred.shape == (4, 3)
+    assert list(y_pred.columns) == list(y.columns)
+    assert (y_pred >= 0).all().all()
+
+
+def test_solve_with_unknown_strategy_throws_error():
+    # --- SETUP ---
+    X = pd.DataFrame({"close": [1.0, 2.0]})
+    y = pd.DataFrame({"close_lead_1": [2.0, 3.0]})
+
+    # --- ACT & ASSERT ---
+    with pytest.raises(ValueError, match="Unknown multi-horizon strategy"):
+        solve({}, X, y, X, strategy="unknown")  # type: ignore
+
+
+def test_solve_single_problem_approach_predicts_every_symbol():
+    # --- SETUP ---
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [pd.period_range("2024-01-01", periods=40, freq="D"), ["a", "b", "c"]], names=["date", "symbol"]
+    )
+    X = pd.DataFrame(rng.random((len(index), 3)), index=index, columns=["f1", "f2", "f3"])
+    y = pd.DataFrame(rng.random((len(index), 2)) + 1, index=index, columns=["y_1", "y_2"])
+
+    # --- ACT ---
+    y_pred = solve({"n_estimators": 5}, X.iloc[:-3], y.iloc[:-3], X.iloc[-3:], single_problem_approach=True, n_jobs=2)
+
+    # --- ASSERT ---
+    assert y_pred.index.equals(X.index[-3:])
+    assert list(y_pred.columns) == ["y_1", "y_2"]
+    assert (y_pred.to_numpy() >= 0).all()
+
+
+def make_model_frames():
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [pd.period_range("2024-01-01", periods=40, freq="D"), ["a", "b", "c"]], names=["date", "symbol"]
+    )
+    X = pd.DataFrame(rng.random((len(index), 3)), index=index, columns=["f1", "f2", "f3"])
+    y = pd.DataFrame(rng.random((len(index), 3)) + 1, index=index, columns=["y_1", "y_2", "y_3"])
+
+    return X.iloc[:-3], y.iloc[:-3], X.iloc[-3:], y.iloc[-3:]
+
+
+@pytest.mark.parametrize("strategy", ["chain", "direct"])
+def test_fit_predict_by_horizon_ends_with_solve_prediction(strategy):
+    # --- SETUP ---
+    X, y, X_query, _ = make_model_frames()
+
+    # --- ACT ---
+    y_preds = list(fit_predict_by_horizon({"n_estimators": 5}, X, y, X_query, strategy))
+
+    # --- ASSERT ---
+    assert [list(y_pred.columns) for y_pred in y_preds] == [["y_1"], ["y_1", "y_2"], ["y_1", "y_2", "y_3"]]
+    pd.testing.assert_frame_equal(
+        y_preds[-1], solve({"n_estimators": 5}, X, y, X_query, strategy=strategy), check_dtype=False
+    )
+
+
+def test_optimize_with_optuna_resumes_stored_study(tmp_path):
+    # --- SETUP ---
+    X, y, X_query, y_query = make_model_frames()
+    storage_file_path = str(tmp_path / "optuna.db")
+    optimize_with_optuna(X, y, X_query, y_query, False, 2, study_name="study", storage_file_path=storage_file_path)
+
+    # --- ACT ---
+    rmsle, params = optimize_with_optuna(
+        X, y, X_query, y_query, False, 3, study_name="study", n_jobs=1, storage_file_path=storage_file_path
+    )
+
+    # --- ASSERT ---
+    study = optuna.load_study(study_name="study", storage=f"sqlite:///{storage_file_path}")
+    assert len(study.trials) == 3
+    assert rmsle == study.best_value
+    assert params == study.best_params
+
+
+def test_get_latest_rows():
+    # --- SETUP ---
+    index = pd.MultiIndex.from_product(
+        [pd.period_range("2024-01-01", periods=3, freq="D"), ["a", "b"]], names=["date", "symbol"]
+    )
+    X = pd.DataFrame({"f1": range(6)}, index=index)
+
+    # --- ACT ---
+    X_latest = get_latest_rows(X)
+
+    # --- ASSERT ---
+    pd.testing.assert_frame_equal(X_latest, X.iloc[-2:])
+
+
+def test_create_model_trains_direct_horizons_in_given_jobs():
+    # --- ACT ---
+    model = create_model("direct", horizon_jobs=1, n_jobs=2)
+
+    # --- ASSERT ---
+    assert model.n_jobs == 1
+    assert model.estimator.n_jobs == 2
+    assert create_model("direct").estimator.n_jobs == 1
+
+
+def test_solve_trains_direct_horizons_in_parallel(monkeypatch):
+    # --- SETUP ---
+    X, y, X_query, _ = make_model_frames()
+    sequential = solve({"n_estimators": 5}, X, y, X_query, strategy="direct", n_jobs=1)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+
+    # --- ACT ---
+    parallel = solve({"n_estimators": 5}, X, y, X_query, strategy="direct", n_jobs=3)
+
+    # --- ASSERT ---
+    pd.testing.assert_frame_equal(parallel, sequential)
+
+
+def test_optuna_optimize_objective_trains_single_problem_symbols_by_trial_threads(monkeypatch):
+    # --- SETUP ---
+    X, y, X_query, y_query = make_model_frames()
+    calls = []
+
+    def fake_solve(hyper_params, X, y, X_query, single_problem_approach, strategy, n_jobs):
+        calls.append((hyper_params["n_jobs"], n_jobs))
+        return y_query
+
+    monkeypatch.setattr("gsp.model.model.solve", fake_solve)
+    trial = optuna.trial.FixedTrial(
+        {
+            "n_estimators": 100,
+            "max_depth": 3,
+            "learning_rate": 0.1,
+            "subsample": 1.0,
+            "colsample_bytree": 1.0,
+            "gamma": 0.1,
+            "reg_alpha": 1.0,
+            "reg_lambda": 1.0,
+            "min_child_weight": 1.0,
+        }
+    )
+
+    # --- ACT ---
+    rmsle = optuna_optimize_objective(trial, X, y, X_query, y_query, True, "chain", 3, None)  # type: ignore
+
+    # --- ASSERT ---
+    assert rmsle == 0
+    assert calls == [(3, 1)]
+
+
+def test_get_column_transformer_keeps_columns_of_train_for_unseen_and_missing_categories(tmp_path, monkeypatch):
+    # --- SETUP ---
+    index = pd.MultiIndex.from_product(
+        [pd.period_range("2024-01-01", periods=3, freq="D"), ["a", "b"]], names=["date", "symbol"]
+    )
+    train = pd.DataFrame(
+        {
+            "close": np.arange(6, dtype="float64"),
+            "volume": np.arange(6),
+            "day_of_week": [0, 0, 1, 1, 2, 2],
+            "area_cat": ["x", "y"] * 3,
+        },
+        index=index,
+    )
+    query = pd.DataFrame(
+        {"close": [0.0, 1.0], "volume": [1, 2], "day_of_week": [2, 2], "area_cat": ["y", "z"]}, index=index[:2]
+    )
+    arguments = (datetime.date(2024, 1, 3), ["day_of_week", "area_cat"], [], [], [])
+    monkeypatch.setattr("gsp.model.model.get_features", lambda *args, **kwargs: train)
+    expected = get_column_transformer(*arguments, directory=str(tmp_path)).transform(get_model_inputs(train))
+    monkeypatch.setattr("gsp.model.model.get_features", lambda *args, **kwargs: pytest.fail("refitted"))
+
+    # --- ACT ---
+    X_query = get_column_transformer(*arguments, directory=str(tmp_path)).transform(get_model_inputs(query))
+
+    # --- ASSERT ---
+    assert list(X_query.columns) == list(expected.columns)
+    assert X_query["onehot__area_cat_y"].tolist() == [1.0, 0.0]
+    assert X_query["remainder__close"].tolist() == [0.0, 1.0]
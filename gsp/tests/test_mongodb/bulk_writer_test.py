@@ -0,0 +1,58 @@
+import pymongo as pm
+from gsp.mongodb.bulk_writer import BulkWriter, chunk_documents, create_write_operations
+
+
+def test_chunk_documents_bounds_count_and_bytes():
+    # --- SETUP ---
+    documents = [{"_id": i, "value": "x" * 100} for i in range(10)]
+
+    # --- ACT ---
+    by_count = list(chunk_documents(documents, batch_size=4))
+    by_bytes = list(chunk_documents(documents, batch_size=100, max_batch_bytes=300))
+
+    # --- ASSERT ---
+    assert [len(batch) for batch in by_count] == [4, 4, 2]
+    assert [len(batch) for batch in by_bytes] == [2, 2, 2, 2, 2]
+
+
+def test_create_write_operations_upserts_by_keys():
+    # --- ACT ---
+    operations = create_write_operations([{"_id": 1, "stock": "s", "date": "d", "close": 1.0}], ["stock", "date"])
+
+    # --- ASSERT ---
+    assert operations == [
+        pm.UpdateOne({"stock": "s", "date": "d"}, {"$set": {"stock": "s", "date": "d", "close": 1.0}}, upsert=True)
+    ]
+
+
+def test_bulk_writer_continues_after_duplicates(fake_collection):
+    # --- SETUP ---
+    collection = fake_collection
+    collection.documents.append({"_id": 3})
+
+    # --- ACT ---
+    report = BulkWriter(batch_size=2, max_in_flight=2).write(collection, ({"_id": i} for i in range(7)))
+
+    # --- ASSERT ---
+    assert [batch.batch for batch in report.batches] == [1, 2, 3, 4]
+    assert report.documents == 7
+    assert report.inserted == 6
+    assert report.errors == 1
+    assert sorted(document["_id"] for document in collection.documents) == list(range(7))
+
+
+def test_bulk_writer_upserts_are_idempotent(fake_collection):
+    # --- SETUP ---
+    collection = fake_collection
+    documents = [{"stock": "s", "date": day, "close": 1.0} for day in range(5)]
+    writer = BulkWriter(batch_size=2)
+
+    # --- ACT ---
+    first = writer.write(collection, documents, upsert_keys=["stock", "date"])
+    second = writer.write(collection, documents, upsert_keys=["stock", "date"])
+
+    # --- ASSERT ---
+    assert first.upserted == 5
+    assert second.upserted == 0
+    assert second.matched == 5
+    assert len(collection.documents) == 5
@@ -0,0 +1,136 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+import pymongo as pm
+import pytest
+from bson import ObjectId
+
+
+def matches(document: Dict, query: Dict) -> bool:
+    """Matches the document against the equality and `$in` conditions of the query."""
+    for key, condition in query.items():
+        if isinstance(condition, dict) and "$in" in condition:
+            if document.get(key) not in condition["$in"]:
+                return False
+        elif document.get(key) != condition:
+            return False
+
+    return True
+
+
+def project(document: Dict, projection: Dict | None) -> Dict:
+    """Applies the inclusion or the exclusion of the top level fields of the projection (`_id` is kept by default)."""
+    if not projection:
+        return dict(document)
+
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and all(fields.values()):
+        projected = {key: value for key, value in document.items() if key in fields or key == "_id"}
+    else:
+        projected = {key: value for key, value in document.items() if key not in fields}
+    if not projection.get("_id", 1):
+        projected.pop("_id", None)
+
+    return projected
+
+
+def apply_update(document: Dict, update: Dict) -> None:
+    """Applies the `$set` (of the dotted paths), `$addToSet` (with `$each`), `$min` and `$max` of the update."""
+    for path, value in update.get("$set", {}).items():
+        *parents, name = path.split(".")
+        target = document
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[name] = value
+    for key, values in update.get("$addToSet", {}).items():
+        stored = document.setdefault(key, [])
+        stored.extend(value for value in values["$each"] if value not in stored)
+    for key, value in update.get("$min", {}).items():
+        document[key] = min(document.get(key, value), value)
+    for key, value in update.get("$max", {}).items():
+        document[key] = max(document.get(key, value), value)
+
+
+@dataclass
+class FakeCollection:
+    """In-memory stand-in for a MongoDB collection, with the inserts, the upserts and the simple queries.
+    The inserts of the existing ids fail like on a unique index, as do the writes of the documents (or the upserts
+    of the filters) matching one of the `failing_queries`.
+    """
+
+    name: str = "fake"
+    documents: List[Dict] = field(default_factory=list)
+    failing_queries: List[Dict] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def find(self, query: Dict | None = None, projection: Dict | None = None) -> List[Dict]:
+        return [project(document, projection) for document in self.documents if matches(document, query or {})]
+
+    def find_one(self, filter: Dict | None = None, sort: List[Tuple[str, int]] | None = None) -> Dict | None:
+        documents = self.find(filter)
+        for key, direction in reversed(sort or []):
+            documents.sort(key=lambda document: document[key], reverse=direction == pm.DESCENDING)
+
+        return next(iter(documents), None)
+
+    def insert_many(self, documents: List[Dict]):
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+            self.documents.append(document)
+
+        return type("Result", (), {"inserted_ids": [document["_id"] for document in documents]})()
+
+    def is_failing(self, document: Dict) -> bool:
+        return any(matches(document, query) for query in self.failing_queries)
+
+    def write_operation(self, operation: Any, details: Dict) -> bool:
+        if isinstance(operation, pm.InsertOne):
+            document = operation._doc
+            if self.is_failing(document) or self.find_one({"_id": document["_id"]}) is not None:
+                return False
+            self.documents.append(document)
+            details["nInserted"] += 1
+            return True
+
+        if self.is_failing(operation._filter):
+            return False
+        stored = next((document for document in self.documents if matches(document, operation._filter)), None)
+        if stored is None:
+            stored = {"_id": ObjectId(), **operation._filter}
+            self.documents.append(stored)
+            details["nUpserted"] += 1
+        else:
+            details["nMatched"] += 1
+        apply_update(stored, operation._doc)
+
+        return True
+
+    def bulk_write(self, operations: List[Any], ordered: bool = True):
+        details: Dict[str, Any] = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "writeErrors": []}
+        with self.lock:
+            for i, operation in enumerate(operations):
+                if not self.write_operation(operation, details):
+                    details["writeErrors"].append({"index": i, "code": 11000})
+
+        if details["writeErrors"]:
+            raise pm.errors.BulkWriteError(details)
+
+        return type("Result", (), {"bulk_api_result": details})()
+
+
+@dataclass
+class FakeDatabase:
+    collections: Dict[str, FakeCollection] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self.collections.setdefault(name, FakeCollection(name=name))
+
+
+@pytest.fixture
+def fake_collection() -> FakeCollection:
+    return FakeCollection()
+
+
+@pytest.fixture
+def fake_database() -> FakeDatabase:
+    return FakeDatabase()
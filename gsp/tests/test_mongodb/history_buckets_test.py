@@ -0,0 +1,79 @@
+import datetime
+from gsp.mongodb.history_buckets import make_history_bucket_update, make_history_buckets, unpack_history_buckets
+
+
+def make_history(stock: str, day: int, close: float, month: int = 1) -> dict:
+    return {
+        "stock": stock,
+        "date": datetime.datetime(2024, month, day),
+        "open": close,
+        "high": close,
+        "low": close,
+        "close": close,
+        "volume": 100,
+    }
+
+
+def test_make_history_buckets_groups_by_stock_and_month():
+    # --- SETUP ---
+    histories = [make_history("a", 3, 3.0), make_history("a", 2, 2.0), make_history("a", 1, 1.0, month=2)]
+    histories.append(make_history("b", 2, 5.0))
+
+    # --- ACT ---
+    buckets = make_history_buckets(histories)
+
+    # --- ASSERT ---
+    assert [(bucket["stock"], bucket["month"].month, len(bucket["days"])) for bucket in buckets] == [
+        ("a", 1, 2),
+        ("a", 2, 1),
+        ("b", 1, 1),
+    ]
+    assert buckets[0]["date"] == [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 3)]
+    assert list(buckets[0]["days"]) == ["2024-01-02", "2024-01-03"]
+    assert buckets[0]["days"]["2024-01-03"] == {"open": 3.0, "high": 3.0, "low": 3.0, "close": 3.0, "volume": 100}
+    assert buckets[0]["start_date"] == datetime.datetime(2024, 1, 2)
+    assert buckets[0]["end_date"] == datetime.datetime(2024, 1, 3)
+
+
+def test_make_history_bucket_update_sets_every_day():
+    # --- SETUP ---
+    [bucket] = make_history_buckets([make_history("a", 2, 2.0), make_history("a", 3, 3.0)])
+
+    # --- ACT ---
+    update = make_history_bucket_update(bucket)
+
+    # --- ASSERT ---
+    assert update == {
+        "$set": {"days.2024-01-02": bucket["days"]["2024-01-02"], "days.2024-01-03": bucket["days"]["2024-01-03"]},
+        "$addToSet": {"date": {"$each": [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 3)]}},
+        "$min": {"start_date": datetime.datetime(2024, 1, 2)},
+        "$max": {"end_date": datetime.datetime(2024, 1, 3)},
+    }
+
+
+def test_unpack_history_buckets_filters_dates():
+    # --- SETUP ---
+    histories = [make_history("a", day, float(day)) for day in range(1, 6)]
+
+    # --- ACT ---
+    unpacked = unpack_history_buckets(
+        make_history_buckets(histories), datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 4)
+    )
+
+    # --- ASSERT ---
+    assert unpacked == histories[1:4]
+
+
+def test_unpack_history_bucket_sorts_days_of_later_writes():
+    # --- SETUP ---
+    [bucket] = make_history_buckets([make_history("a", 3, 3.0)])
+    [earlier_bucket] = make_history_buckets([make_history("a", 1, 1.0)])
+    bucket["days"].update(earlier_bucket["days"])
+    bucket["date"].extend(earlier_bucket["date"])
+
+    # --- ACT ---
+    unpacked = unpack_history_buckets([bucket])
+
+    # --- ASSERT ---
+    assert bucket["date"] == [datetime.datetime(2024, 1, 3), datetime.datetime(2024, 1, 1)]
+    assert unpacked == [make_history("a", 1, 1.0), make_history("a", 3, 3.0)]
@@ -0,0 +1,42 @@
+from gsp.mongodb.references import chunk_ids, collect_reference_ids, get_reference_projection, replace_references
+
+
+def test_collect_reference_ids():
+    # --- SETUP ---
+    documents = [{"stock": 2}, {"stock": 1}, {"predictions": [3, 4]}, {"stock": 2}]
+
+    # --- ACT ---
+    stock_ids = collect_reference_ids(documents, "stock")
+    prediction_ids = collect_reference_ids(documents, "predictions")
+
+    # --- ASSERT ---
+    assert stock_ids == [2, 1]
+    assert prediction_ids == [3, 4]
+
+
+def test_chunk_ids():
+    assert list(chunk_ids([1, 2, 3, 4, 5], batch_size=2)) == [[1, 2], [3, 4], [5]]
+
+
+def test_replace_references():
+    # --- SETUP ---
+    referenced_documents = {1: {"_id": 1, "close": 1.0}, 2: {"_id": 2, "close": 2.0}}
+    documents = [{"predictions": [2, 5, 1]}, {"predictions": 1}, {"predictions": 5}, {"name": "other"}]
+
+    # --- ACT ---
+    replace_references(documents, "predictions", referenced_documents)
+
+    # --- ASSERT ---
+    assert documents == [
+        {"predictions": [referenced_documents[2], referenced_documents[1]]},
+        {"predictions": referenced_documents[1]},
+        {"predictions": None},
+        {"name": "other"},
+    ]
+
+
+def test_get_reference_projection_keeps_ids():
+    assert get_reference_projection(None) is None
+    assert get_reference_projection({"close": 1, "_id": 0}) == {"close": 1, "_id": 1}
+    assert get_reference_projection({"close": 0, "_id": 0}) == {"close": 0}
+    assert get_reference_projection({"_id": 0}) is None
@@ -0,0 +1,169 @@
+import datetime
+import pytest
+
+pytest.importorskip("generated.generation", reason="the generated classes are built by `make codegen`")
+
+from generated.generation import Generation  # noqa: E402
+from gsp.mongodb.stock_ref_mapping import StockRefMapping  # noqa: E402
+from gsp.mongodb.storage_collections import StorageCollections  # noqa: E402
+from gsp.mongodb.storage_helper import StorageHelper, get_prediction_id  # noqa: E402
+
+
+@pytest.fixture
+def storage_helper(monkeypatch, fake_database):
+    """A storage helper of the fake database with the stocks A and B."""
+    monkeypatch.setattr(StorageHelper, "setup_connection", lambda self: self)
+    storage_helper = StorageHelper(client={"test": fake_database}, db_name="test")  # type: ignore
+    storage_helper.insert_documents(StorageCollections.STOCKS, [{"symbol": "A"}, {"symbol": "B"}])
+
+    return storage_helper
+
+
+@pytest.fixture
+def generation():
+    return Generation.from_dict(
+        {
+            "date": "2024-01-03",
+            "name": "generation",
+            "created_at": "2024-01-03T10:00:00",
+            "categorical_features": [],
+            "label_features": ["close"],
+            "shifts": [1],
+            "mwms": [2],
+            "days_back_to_consider": 10,
+            "n_step": 2,
+            "hyper_params": {},
+        }
+    )
+
+
+def get_stock_ids(storage_helper):
+    return {stock["symbol"]: stock["_id"] for stock in storage_helper.load_collection(StorageCollections.STOCKS).find()}
+
+
+def create_histories_mapping():
+    def history(day, close):
+        date = datetime.datetime(2024, 1, day)
+        return {"date": date, "open": close, "high": close, "low": close, "close": close, "volume": 1}
+
+    return StockRefMapping().add("A", [history(2, 1.0), history(3, 2.0)]).add("B", [history(2, 3.0)])
+
+
+def create_predictions_mapping():
+    def prediction(day, close):
+        return {"date": datetime.datetime(2024, 1, day), "close": close}
+
+    return StockRefMapping().add("A", [prediction(4, 1.0), prediction(5, 2.0)]).add("B", [prediction(4, 3.0)])
+
+
+def test_add_histories_upserts_by_stock_and_date(storage_helper):
+    # --- SETUP ---
+    stock_ids = get_stock_ids(storage_helper)
+    histories = storage_helper.load_collection(StorageCollections.HISTORIES)
+
+    # --- ACT ---
+    first = storage_helper.add_histories(create_histories_mapping())
+    second = storage_helper.add_histories(create_histories_mapping())
+
+    # --- ASSERT ---
+    assert (first.upserted, first.matched) == (3, 0)
+    assert (second.upserted, second.matched) == (0, 3)
+    assert len(histories.documents) == 3
+    assert histories.find_one({"stock": stock_ids["A"], "date": datetime.datetime(2024, 1, 3)})["close"] == 2.0
+
+
+def test_add_histories_raises_on_failed_histories(storage_helper):
+    # --- SETUP ---
+    histories = storage_helper.load_collection(StorageCollections.HISTORIES)
+    histories.failing_queries.append({"date": datetime.datetime(2024, 1, 3)})
+
+    # --- ACT & ASSERT ---
+    with pytest.raises(Exception, match="1 of 3 documents failed"):
+        storage_helper.add_histories(create_histories_mapping())
+    assert len(histories.documents) == 2
+
+
+def test_add_histories_into_buckets_keeps_days_of_other_writes(storage_helper):
+    # --- SETUP ---
+    storage_helper.bucketed_histories = True
+    stock_ids = get_stock_ids(storage_helper)
+    buckets = storage_helper.load_collection(StorageCollections.HISTORY_BUCKETS)
+    later_mapping = StockRefMapping().add(
+        "A",
+        [
+            {"date": datetime.datetime(2024, 1, 3), "close": 20.0},
+            {"date": datetime.datetime(2024, 1, 4), "close": 4.0},
+            {"date": datetime.datetime(2024, 1, 1), "close": 0.5},
+        ],
+    )
+
+    # --- ACT ---
+    storage_helper.add_histories(create_histories_mapping())
+    storage_helper.add_histories(later_mapping)
+    histories = storage_helper.load_histories([stock_ids["A"]])
+
+    # --- ASSERT ---
+    assert len(buckets.documents) == 2
+    assert [(history["date"].day, history["close"]) for history in histories] == [
+        (1, 0.5),
+        (2, 1.0),
+        (3, 20.0),
+        (4, 4.0),
+    ]
+    assert buckets.find_one({"stock": stock_ids["A"]})["start_date"] == datetime.datetime(2024, 1, 1)
+    assert storage_helper.get_latest_history_date() == datetime.date(2024, 1, 4)
+
+
+def test_add_generation_with_predictions_upserts_by_derived_ids(storage_helper, generation):
+    # --- SETUP ---
+    stock_ids = get_stock_ids(storage_helper)
+    predictions = storage_helper.load_collection(StorageCollections.PREDICTIONS)
+    generations = storage_helper.load_collection(StorageCollections.GENERATIONS)
+    expected_ids = [
+        get_prediction_id(generation, stock_ids["A"], datetime.datetime(2024, 1, 4)),
+        get_prediction_id(generation, stock_ids["A"], datetime.datetime(2024, 1, 5)),
+        get_prediction_id(generation, stock_ids["B"], datetime.datetime(2024, 1, 4)),
+    ]
+
+    # --- ACT ---
+    first_generation, first = storage_helper.add_generation_with_predictions(generation, create_predictions_mapping())
+    second_generation, second = storage_helper.add_generation_with_predictions(generation, create_predictions_mapping())
+
+    # --- ASSERT ---
+    assert (first.upserted, second.upserted, second.matched) == (3, 0, 3)
+    assert (first_generation.upserted, second_generation.upserted, second_generation.matched) == (1, 0, 1)
+    assert [prediction["_id"] for prediction in predictions.documents] == expected_ids
+    assert predictions.find_one({"_id": expected_ids[2]})["stock"] == stock_ids["B"]
+    assert [generation["predictions"] for generation in generations.documents] == [expected_ids]
+
+
+def test_add_generation_with_predictions_raises_before_generation(storage_helper, generation):
+    # --- SETUP ---
+    stock_ids = get_stock_ids(storage_helper)
+    predictions = storage_helper.load_collection(StorageCollections.PREDICTIONS)
+    generations = storage_helper.load_collection(StorageCollections.GENERATIONS)
+    predictions.failing_queries.append(
+        {"_id": get_prediction_id(generation, stock_ids["A"], datetime.datetime(2024, 1, 5))}
+    )
+
+    # --- ACT & ASSERT ---
+    with pytest.raises(Exception, match="1 of 3 documents failed to be written into predictions"):
+        storage_helper.add_generation_with_predictions(generation, create_predictions_mapping())
+    assert len(predictions.documents) == 2
+    assert generations.documents == []
+
+
+def test_load_collection_documents_resolves_references_without_projected_ids(storage_helper):
+    # --- SETUP ---
+    stock_ids = get_stock_ids(storage_helper)
+    storage_helper.insert_documents(StorageCollections.HISTORIES, [{"stock": stock_ids["A"], "close": 1.0}])
+
+    # --- ACT ---
+    histories = storage_helper.load_collection_documents(
+        StorageCollections.HISTORIES,
+        reference={"stock": StorageCollections.STOCKS},
+        reference_projection={"stock": {"symbol": 1, "_id": 0}},
+    )
+
+    # --- ASSERT ---
+    assert [history["stock"]["symbol"] for history in histories] == ["A"]
@@ -0,0 +1,218 @@
+import os
+import datetime
+import pytest
+import pymongo as pm
+from bson import ObjectId
+from gsp.mongodb.storage_collections import StorageCollections
+from gsp.mongodb.storage_indexes import (
+    STORAGE_INDEXES,
+    ensure_indexes,
+    get_plan_stages,
+    is_collection_scan,
+    remove_duplicates,
+)
+
+
+@pytest.fixture
+def database():
+    """A throwaway database of the MongoDB given by MONGODB_TEST_URI, the tests are skipped without it."""
+    uri = os.getenv("MONGODB_TEST_URI")
+    if not uri:
+        pytest.skip("MONGODB_TEST_URI is not set")
+
+    client: pm.MongoClient = pm.MongoClient(uri, serverSelectionTimeoutMS=2000)
+    database = client["gsp-index-test"]
+    client.drop_database(database.name)
+    yield database
+    client.drop_database(database.name)
+    client.close()
+
+
+# --- NOTE ---
+# Winning plans recorded from the explains of MongoDB 7 (trimmed to the stages and the index names).
+INDEXED_IN_PLAN = {
+    "stage": "FETCH",
+    "inputStage": {"stage": "IXSCAN", "indexName": "_id_", "indexBounds": {"_id": ["[1, 1]", "[2, 2]"]}},
+}
+BUCKET_PLAN = {
+    "queryPlan": {
+        "stage": "FETCH",
+        "planNodeId": 2,
+        "inputStage": {"stage": "IXSCAN", "planNodeId": 1, "indexName": "stock_month"},
+    },
+    "slotBasedPlan": {"slots": "...", "stages": "..."},
+}
+OR_PLAN = {
+    "stage": "SUBPLAN",
+    "inputStage": {
+        "stage": "FETCH",
+        "inputStage": {
+            "stage": "OR",
+            "inputStages": [
+                {"stage": "IXSCAN", "indexName": "symbol"},
+                {"stage": "IXSCAN", "indexName": "_id_"},
+            ],
+        },
+    },
+}
+OR_SCAN_PLAN = {
+    "stage": "OR",
+    "inputStages": [
+        {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "symbol"}},
+        {"stage": "COLLSCAN", "filter": {"company": {"$eq": "Apple"}}},
+    ],
+}
+SHARDED_PLAN = {
+    "stage": "SHARD_MERGE",
+    "shards": [
+        {"shardName": "shard-0", "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+        {"shardName": "shard-1", "winningPlan": {"stage": "SHARDING_FILTER", "inputStage": {"stage": "COLLSCAN"}}},
+    ],
+}
+
+
+def test_get_plan_stages():
+    # --- SETUP ---
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+
+    # --- ACT & ASSERT ---
+    assert get_plan_stages(plan) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert not is_collection_scan({"queryPlanner": {"winningPlan": plan}})
+    assert is_collection_scan({"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}})
+
+
+@pytest.mark.parametrize(
+    "plan, stages",
+    [
+        (INDEXED_IN_PLAN, ["FETCH", "IXSCAN"]),
+        (BUCKET_PLAN, ["FETCH", "IXSCAN"]),
+        (OR_PLAN, ["SUBPLAN", "FETCH", "OR", "IXSCAN", "IXSCAN"]),
+        (OR_SCAN_PLAN, ["OR", "FETCH", "IXSCAN", "COLLSCAN"]),
+        (SHARDED_PLAN, ["SHARD_MERGE", "FETCH", "IXSCAN", "SHARDING_FILTER", "COLLSCAN"]),
+    ],
+)
+def test_get_plan_stages_of_nested_plans(plan, stages):
+    assert get_plan_stages(plan) == stages
+
+
+@pytest.mark.parametrize(
+    "plan, collection_scan",
+    [(INDEXED_IN_PLAN, False), (BUCKET_PLAN, False), (OR_PLAN, False), (OR_SCAN_PLAN, True), (SHARDED_PLAN, True)],
+)
+def test_is_collection_scan_of_nested_plans(plan, collection_scan):
+    assert is_collection_scan({"queryPlanner": {"winningPlan": plan}}) is collection_scan
+
+
+def test_ensure_indexes_creates_declared_indexes():
+    # --- SETUP ---
+    created = {}
+
+    class FakeCollection:
+        def __init__(self, name):
+            self.name = name
+
+        def create_indexes(self, indexes):
+            created[self.name] = indexes
+            return [index.document["name"] for index in indexes]
+
+    database = {collection.value: FakeCollection(collection.value) for collection in StorageCollections}
+
+    # --- ACT ---
+    names = ensure_indexes(database)  # type: ignore
+
+    # --- ASSERT ---
+    assert names[StorageCollections.HISTORIES.value] == ["stock_date", "date"]
+    assert created == {collection.value: indexes for collection, indexes in STORAGE_INDEXES.items()}
+
+
+def test_remove_duplicates_keeps_first_documents_of_unique_keys():
+    # --- SETUP ---
+    deleted = {}
+
+    class FakeCollection:
+        def __init__(self, name, duplicates):
+            self.name = name
+            self.duplicates = duplicates
+            self.pipelines = []
+
+        def aggregate(self, pipeline, allowDiskUse):
+            self.pipelines.append(pipeline)
+            return iter(self.duplicates)
+
+        def delete_many(self, filter):
+            deleted[self.name] = filter["_id"]["$in"]
+            return pm.results.DeleteResult({"n": len(filter["_id"]["$in"])}, acknowledged=True)
+
+    stocks = FakeCollection(StorageCollections.STOCKS.value, [{"_id": {"symbol": "AAPL"}, "ids": [1, 2, 3]}])
+    predictions = FakeCollection(StorageCollections.PREDICTIONS.value, [{"_id": {}, "ids": [4, 5]}])
+    database = {stocks.name: stocks, predictions.name: predictions}
+
+    # --- ACT ---
+    removed = remove_duplicates(database, [StorageCollections.STOCKS, StorageCollections.PREDICTIONS])  # type: ignore
+
+    # --- ASSERT ---
+    assert removed == {StorageCollections.STOCKS.value: 2}
+    assert deleted == {StorageCollections.STOCKS.value: [2, 3]}
+    assert stocks.pipelines[0][1]["$group"]["_id"] == {"symbol": "$symbol"}
+    assert predictions.pipelines == []
+
+
+def test_remove_duplicates_allows_unique_indexes(database):
+    # --- SETUP ---
+    stock_id = ObjectId()
+    date = datetime.datetime(2024, 6, 3)
+    histories = database[StorageCollections.HISTORIES.value]
+    histories.insert_many([{"stock": stock_id, "date": date, "close": close} for close in [1.0, 2.0]])
+    database[StorageCollections.STOCKS.value].insert_many([{"symbol": "AAPL"}, {"symbol": "AAPL"}])
+
+    # --- ACT ---
+    with pytest.raises(pm.errors.OperationFailure):
+        ensure_indexes(database, [StorageCollections.HISTORIES])
+    removed = remove_duplicates(database)
+    ensure_indexes(database)
+
+    # --- ASSERT ---
+    assert removed == {StorageCollections.HISTORIES.value: 1, StorageCollections.STOCKS.value: 1}
+    assert [history["close"] for history in histories.find()] == [1.0]
+
+
+def test_hot_queries_do_not_scan_collections(database):
+    # --- SETUP ---
+    ensure_indexes(database)
+    stock_id = ObjectId()
+    date = datetime.datetime(2024, 6, 3)
+    database[StorageCollections.STOCKS.value].insert_one({"_id": stock_id, "symbol": "AAPL"})
+    database[StorageCollections.HISTORIES.value].insert_one({"stock": stock_id, "date": date, "close": 1.0})
+    database[StorageCollections.GENERATIONS.value].insert_one({"date": date, "name": "generation"})
+    database[StorageCollections.HISTORY_BUCKETS.value].insert_one(
+        {
+            "stock": stock_id,
+            "month": datetime.datetime(2024, 6, 1),
+            "end_date": date,
+            "date": [date],
+            "days": {"2024-06-03": {"close": 1.0}},
+        }
+    )
+    histories = database[StorageCollections.HISTORIES.value]
+    buckets = database[StorageCollections.HISTORY_BUCKETS.value]
+    generations = database[StorageCollections.GENERATIONS.value]
+    prediction_ids = [ObjectId() for _ in range(3)]
+
+    # --- ACT ---
+    explains = [
+        histories.find({"date": date}).limit(1).explain(),
+        histories.find({}).sort("date", pm.DESCENDING).limit(1).explain(),
+        histories.find({"stock": stock_id, "date": date}).explain(),
+        generations.find({"date": date, "name": "generation"}).limit(1).explain(),
+        generations.find({"name": "generation"}).limit(1).explain(),
+        database[StorageCollections.STOCKS.value].find({"symbol": {"$in": ["AAPL", "MSFT"]}}).explain(),
+        buckets.find({"stock": {"$in": [stock_id]}, "month": {"$in": [datetime.datetime(2024, 6, 1)]}}).explain(),
+        buckets.find({"stock": stock_id, "month": datetime.datetime(2024, 6, 1)}).explain(),
+        buckets.find({"date": date}).limit(1).explain(),
+        buckets.find({}).sort("end_date", pm.DESCENDING).limit(1).explain(),
+        database[StorageCollections.PREDICTIONS.value].find({"_id": {"$in": prediction_ids}}).explain(),
+        database[StorageCollections.STOCKS.value].find({"_id": {"$in": [stock_id]}}).explain(),
+    ]
+
+    # --- ASSERT ---
+    assert [is_collection_scan(explain) for explain in explains] == [False] * len(explains)
@@ -0,0 +1,57 @@
+import datetime
+import numpy as np
+import pandas as pd
+from gsp.publisher.records import HISTORY_COLUMNS, PREDICTION_COLUMNS, get_symbol_records
+
+
+def test_get_symbol_records():
+    # --- SETUP ---
+    df = pd.DataFrame(
+        {
+            "date": ["2024-01-02", "2024-01-02", "2024-01-03", "2024-01-03"],
+            "symbol": pd.Categorical(["B", "A", "B", "A"]),
+            "open": [1.0, 2.0, 3.0, 4.0],
+            "high": [1.0, 2.0, 3.0, 4.0],
+            "low": [1.0, 2.0, 3.0, 4.0],
+            "close": [1.5, 2.5, 3.5, np.nan],
+            "volume": pd.array([10, 20, None, 40], dtype="Int64"),
+            "area": ["x", "y", "x", "y"],
+        }
+    )
+
+    # --- ACT ---
+    records = get_symbol_records(df, HISTORY_COLUMNS, parse_dates=True)
+
+    # --- ASSERT ---
+    assert list(records) == ["A", "B"]
+    assert records["A"] == [
+        {"date": datetime.datetime(2024, 1, 2), "open": 2.0, "high": 2.0, "low": 2.0, "close": 2.5, "volume": 20},
+        {"date": datetime.datetime(2024, 1, 3), "open": 4.0, "high": 4.0, "low": 4.0, "close": None, "volume": 40},
+    ]
+    assert [record["volume"] for record in records["B"]] == [10, None]
+    assert type(records["A"][0]["date"]) is datetime.datetime
+    assert type(records["A"][0]["volume"]) is int
+
+
+def test_get_symbol_records_keeps_rows_with_missing_values():
+    # --- SETUP ---
+    df = pd.DataFrame({"date": ["2024-01-02", "2024-01-03"], "symbol": ["A", "A"], "close": [np.nan, 1.0]})
+
+    # --- ACT ---
+    records = get_symbol_records(df, PREDICTION_COLUMNS)
+
+    # --- ASSERT ---
+    assert records == {"A": [{"date": "2024-01-02", "close": None}, {"date": "2024-01-03", "close": 1.0}]}
+
+
+def test_get_symbol_records_of_symbols():
+    # --- SETUP ---
+    df = pd.DataFrame({"date": ["2024-01-02"] * 3, "symbol": ["A", "B", "C"], "close": [1.0, 2.0, 3.0]})
+
+    # --- ACT ---
+    records = get_symbol_records(df, ["close"], symbols=["C", "A"])
+    no_records = get_symbol_records(df, ["close"], symbols=[])
+
+    # --- ASSERT ---
+    assert records == {"A": [{"close": 1.0}], "C": [{"close": 3.0}]}
+    assert no_records == {}
@@ -0,0 +1,16 @@
+from gsp.scraper.benchmark import run_benchmark
+
+
+def test_run_benchmark_scrapes_all_symbols_from_fake_server():
+    """Tests if the benchmark runs the whole scraping against the fake endpoint and reports the metrics."""
+
+    # --- ACT ---
+    result = run_benchmark(symbols=12, latency=0.0, rows=30)
+
+    # --- ASSERT ---
+    assert result.requests == 12
+    assert result.dead_letters == 0
+    assert result.symbols_per_second > 0
+    assert result.bytes_per_second > 0
+    assert result.peak_rss_bytes > 0
+    assert 0 <= result.p50_latency_seconds <= result.p99_latency_seconds
@@ -0,0 +1,32 @@
+import json
+from typing import Callable, Iterator
+import pytest
+from data import SETUP_STOCK_ALIAS
+from gsp.scraper.fake_yahoo_server import FakeYahooServer
+
+STUB_CSV: str = (
+    "Date,Open,High,Low,Close,Adj Close,Volume\n"
+    "2024-05-20,1.0,2.0,0.5,1.5,1.5,100\n"
+    "2024-05-21,1.5,2.5,1.0,2.0,2.0,200\n"
+    "2024-05-22,2.0,3.0,1.5,2.5,2.5,300\n"
+)
+
+
+@pytest.fixture
+def yahoo_stub_server() -> Iterator[FakeYahooServer]:
+    """Local stand-in for the yahoo finance download endpoint, serving `STUB_CSV` to every symbol by default."""
+    with FakeYahooServer(default_history=STUB_CSV).serve() as server:
+        yield server
+
+
+@pytest.fixture
+def use_stock_setup(tmp_path, monkeypatch) -> Callable[[SETUP_STOCK_ALIAS], None]:
+    """Points the scraper to the given stock setup and to a temporary scraped stocks store."""
+
+    def use(stock_setup: SETUP_STOCK_ALIAS) -> None:
+        setup_file_path = tmp_path / "stocks_setup.json"
+        setup_file_path.write_text(json.dumps(stock_setup))
+        monkeypatch.setattr("gsp.scraper.run.SETUP_STOCK_FILE_PATH", str(setup_file_path))
+        monkeypatch.setattr("data.SCRAPED_STOCK_STORE_PATH", str(tmp_path / "stocks"))
+
+    return use
@@ -0,0 +1,20 @@
+import datetime
+from gsp.scraper.fake_yahoo_server import filter_history
+from conftest import STUB_CSV
+
+
+def get_timestamp(date: datetime.date) -> int:
+    return int(datetime.datetime.combine(date, datetime.time()).timestamp())
+
+
+def test_filter_history_keeps_rows_within_period():
+    # --- ACT ---
+    from_start = filter_history(STUB_CSV, get_timestamp(datetime.date(2024, 5, 21)))
+    within = filter_history(
+        STUB_CSV, get_timestamp(datetime.date(2024, 5, 21)), get_timestamp(datetime.date(2024, 5, 21))
+    )
+
+    # --- ASSERT ---
+    assert from_start.splitlines()[1:] == STUB_CSV.splitlines()[2:]
+    assert within.splitlines() == [STUB_CSV.splitlines()[0], STUB_CSV.splitlines()[2]]
+    assert filter_history(STUB_CSV) == STUB_CSV
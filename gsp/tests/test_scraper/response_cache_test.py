@@ -0,0 +1,107 @@
+import datetime
+import pytest
+from gsp.scraper.cache import ResponseCache
+from gsp.scraper.run import scrape
+from data import load_scraped_stocks
+
+
+def test_response_cache_serves_repeated_downloads_from_disk(yahoo_stub_server, tmp_path):
+    # --- SETUP ---
+    cache = ResponseCache(directory=str(tmp_path))
+
+    # --- ACT ---
+    first = cache.download("AAPL", datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+    second = cache.download("AAPL", datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+    other_end_date = cache.download("AAPL", datetime.date(2024, 5, 21), base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    assert first == second
+    assert other_end_date != first
+    assert yahoo_stub_server.requests == ["AAPL", "AAPL"]
+
+
+def test_response_cache_offline_mode_serves_only_cached_histories(yahoo_stub_server, tmp_path):
+    # --- SETUP ---
+    ResponseCache(directory=str(tmp_path)).download(
+        "AAPL", datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url
+    )
+    cache = ResponseCache(directory=str(tmp_path), offline=True)
+
+    # --- ACT ---
+    data = cache.download("AAPL", datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    assert data.startswith("Date,Open,High,Low,Close,Adj Close,Volume")
+    with pytest.raises(Exception, match="offline mode"):
+        cache.download("MSFT", datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+    assert yahoo_stub_server.requests == ["AAPL"]
+
+
+def test_scraper_task_reruns_without_network_from_cache(yahoo_stub_server, use_stock_setup, tmp_path):
+    # --- SETUP ---
+    use_stock_setup({"AI": [{"company_name": "Google", "stock_id": "GOOGL"}]})
+    scrape(
+        datetime.date(2024, 5, 22),
+        base_url=yahoo_stub_server.base_url,
+        cache=ResponseCache(directory=str(tmp_path / "cache")),
+    )
+
+    # --- ACT ---
+    scrape(
+        datetime.date(2024, 5, 22),
+        base_url=yahoo_stub_server.base_url,
+        full_refresh=True,
+        cache=ResponseCache(directory=str(tmp_path / "cache"), offline=True),
+    )
+
+    # --- ASSERT ---
+    assert yahoo_stub_server.requests == ["GOOGL"]
+    assert len(load_scraped_stocks()) == 3
+
+
+def test_response_cache_serves_incremental_histories_covering_request(yahoo_stub_server, tmp_path):
+    # --- SETUP ---
+    cache = ResponseCache(directory=str(tmp_path))
+    end_date = datetime.date(2024, 5, 24)
+    cache.download("AAPL", end_date, start_date=datetime.date(2024, 5, 21), base_url=yahoo_stub_server.base_url)
+    offline_cache = ResponseCache(directory=str(tmp_path), offline=True)
+
+    # --- ACT ---
+    data = offline_cache.download("AAPL", end_date, start_date=datetime.date(2024, 5, 22))
+
+    # --- ASSERT ---
+    assert "2024-05-22" in data
+    with pytest.raises(Exception, match="offline mode"):
+        offline_cache.download("AAPL", end_date, start_date=datetime.date(2024, 5, 20))
+    with pytest.raises(Exception, match="offline mode"):
+        offline_cache.download("AAPL", end_date)
+    assert yahoo_stub_server.requests == ["AAPL"]
+
+
+def test_scraper_reruns_offline_after_online_run_on_same_store(yahoo_stub_server, use_stock_setup, tmp_path):
+    # --- SETUP ---
+    # The last stored date stays before the run date (no trading on 2024-05-23 and 2024-05-24),
+    # so the rerun starts at a later watermark than the online run.
+    use_stock_setup({"AI": [{"company_name": "Google", "stock_id": "GOOGL"}]})
+    scrape(
+        datetime.date(2024, 5, 21),
+        base_url=yahoo_stub_server.base_url,
+        cache=ResponseCache(directory=str(tmp_path / "cache")),
+    )
+    scrape(
+        datetime.date(2024, 5, 24),
+        base_url=yahoo_stub_server.base_url,
+        cache=ResponseCache(directory=str(tmp_path / "cache")),
+    )
+
+    # --- ACT ---
+    dead_letters = scrape(
+        datetime.date(2024, 5, 24),
+        base_url=yahoo_stub_server.base_url,
+        cache=ResponseCache(directory=str(tmp_path / "cache"), offline=True),
+    )
+
+    # --- ASSERT ---
+    assert dead_letters == []
+    assert yahoo_stub_server.requests == ["GOOGL", "GOOGL"]
+    assert len(load_scraped_stocks()) == 3
@@ -0,0 +1,76 @@
+import time
+import datetime
+import email.utils
+import pytest
+from gsp.scraper.download import download_stocks_history_from_yahoo_api
+from gsp.scraper.scheduler import MAX_RETRY_AFTER_SECONDS, RequestScheduler, TokenBucket, parse_retry_after
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    # --- SETUP ---
+    retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=30)
+
+    # --- ACT ---
+    seconds = parse_retry_after("5")
+    date_seconds = parse_retry_after(email.utils.format_datetime(retry_at, usegmt=True))
+
+    # --- ASSERT ---
+    assert seconds == 5.0
+    assert date_seconds is not None and 25 <= date_seconds <= 30
+    assert parse_retry_after("3600") == MAX_RETRY_AFTER_SECONDS
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_spreads_requests_beyond_the_burst():
+    # --- SETUP ---
+    bucket = TokenBucket(rate=10.0, capacity=2)
+
+    # --- ACT ---
+    waits = [bucket.reserve() for _ in range(4)]
+
+    # --- ASSERT ---
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_request_scheduler_backs_off_on_throttling_and_recovers():
+    # --- SETUP ---
+    scheduler = RequestScheduler(rate=8.0, min_rate=1.0, max_concurrency=8)
+    url = "http://127.0.0.1/v7/finance/download/AAPL"
+
+    # --- ACT ---
+    scheduler.on_throttle(url, retry_after=0.2)
+    throttled = (scheduler.concurrency, scheduler.get_bucket(url).rate)
+    for _ in range(100):
+        scheduler.on_success(url)
+
+    # --- ASSERT ---
+    assert throttled == (4.0, 4.0)
+    assert scheduler.concurrency == 8.0
+    assert scheduler.get_bucket(url).rate == 8.0
+    assert scheduler.get_bucket(url).paused_until > time.monotonic()
+
+
+def test_download_stocks_history_from_yahoo_api_waits_for_retry_after(yahoo_stub_server):
+    # --- SETUP ---
+    yahoo_stub_server.fail("AAPL", 429)
+    yahoo_stub_server.retry_after = "1"
+    scheduler = RequestScheduler()
+
+    # --- ACT ---
+    start = time.monotonic()
+    download_stocks_history_from_yahoo_api(
+        stock_id="AAPL",
+        end_date=datetime.date.today(),
+        base_url=yahoo_stub_server.base_url,
+        backoff_factor=0.01,
+        scheduler=scheduler,
+    )
+    elapsed = time.monotonic() - start
+
+    # --- ASSERT ---
+    assert yahoo_stub_server.requests == ["AAPL", "AAPL"]
+    assert elapsed >= 1.0
+    assert scheduler.concurrency < scheduler.max_concurrency
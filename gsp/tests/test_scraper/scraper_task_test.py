@@ -3,10 +3,11 @@ import io
 import os
 import pandas as pd
 import pytest
-from gsp.scraper.run import scrape
+from gsp.scraper.run import get_setup_dtypes, parse_stocks_history, scrape
 from gsp.scraper.download import download_stocks_history_from_yahoo_api
-from data import SCRAPED_STOCK_FILE_PATH
+from data import SCRAPED_STOCK_STORE_PATH, load_scraped_stocks
 import logging
+from conftest import STUB_CSV
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +36,190 @@ def test_scraper_task_downlaods_and_saves_stocks_history():
     scrape(datetime.date.today())
 
     # --- ASSERT ---
-    if os.path.exists(SCRAPED_STOCK_FILE_PATH):
+    if os.path.exists(SCRAPED_STOCK_STORE_PATH):
         assert True
     else:
-        pytest.fail("Path to scraped stocks file is incorrect : " + SCRAPED_STOCK_FILE_PATH)
+        pytest.fail("Path to scraped stocks store is incorrect : " + SCRAPED_STOCK_STORE_PATH)
+
+
+def test_download_stocks_history_from_yahoo_api_retries_with_backoff(yahoo_stub_server):
+    """Tests if retryable status codes are retried before the history is returned."""
+
+    # --- SETUP ---
+    yahoo_stub_server.fail("AAPL", 503, 429)
+
+    # --- ACT ---
+    data = download_stocks_history_from_yahoo_api(
+        stock_id="AAPL", end_date=datetime.date.today(), base_url=yahoo_stub_server.base_url, backoff_factor=0.01
+    )
+
+    # --- ASSERT ---
+    assert yahoo_stub_server.requests == ["AAPL", "AAPL", "AAPL"]
+    assert not pd.read_csv(io.StringIO(data)).empty
+
+
+def test_download_stocks_history_from_yahoo_api_does_not_retry_client_errors(yahoo_stub_server):
+    """Tests if non-retryable status codes fail immediately."""
+
+    # --- SETUP ---
+    yahoo_stub_server.fail("AAPL", 404)
+
+    # --- ACT ---
+    with pytest.raises(Exception, match="Status code: 404"):
+        download_stocks_history_from_yahoo_api(
+            stock_id="AAPL", end_date=datetime.date.today(), base_url=yahoo_stub_server.base_url, backoff_factor=0.01
+        )
+
+    # --- ASSERT ---
+    assert yahoo_stub_server.requests == ["AAPL"]
+
+
+def test_parse_stocks_history_types_columns_in_single_pass():
+    """Tests if the history is parsed with the final types and the rows with missing values are removed."""
+
+    # --- SETUP ---
+    stock_setup = {
+        "AI": [{"company_name": "Google", "stock_id": "GOOGL"}],
+        "gaming": [{"company_name": "Sony", "stock_id": "SONY"}],
+    }
+    data = STUB_CSV + "2024-05-23,null,null,null,null,null,null\n"
+
+    # --- ACT ---
+    df = parse_stocks_history(data, "AI", stock_setup["AI"][0], get_setup_dtypes(stock_setup))
+
+    # --- ASSERT ---
+    assert len(df) == 3
+    assert df["date"].dtype == "period[D]"
+    assert df["close"].dtype == "float64"
+    assert df["volume"].dtype == "int64"
+    assert list(df["symbol"].cat.categories) == ["GOOGL", "SONY"]
+    assert list(df["area"].cat.categories) == ["AI", "gaming"]
+    assert list(df["company"].astype(str).unique()) == ["Google"]
+
+
+def test_scraper_task_downloads_concurrently_over_pooled_session(yahoo_stub_server, use_stock_setup):
+    """Tests if the scraper downloads every configured stock and reuses keep-alive connections."""
+
+    # --- SETUP ---
+    stock_ids = [f"S{i}" for i in range(12)]
+    use_stock_setup(
+        {
+            "area_a": [{"company_name": stock_id, "stock_id": stock_id} for stock_id in stock_ids[:6]],
+            "area_b": [{"company_name": stock_id, "stock_id": stock_id} for stock_id in stock_ids[6:]],
+        }
+    )
+
+    # --- ACT ---
+    scrape(datetime.date.today(), max_workers=4, base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    df = load_scraped_stocks()
+    assert sorted(yahoo_stub_server.requests) == sorted(stock_ids)
+    assert len(yahoo_stub_server.connections) <= 4
+    assert sorted(df["symbol"].unique()) == sorted(stock_ids)
+    assert df.groupby("symbol", observed=True)["area"].first().to_dict() == {
+        stock_id: "area_a" if i < 6 else "area_b" for i, stock_id in enumerate(stock_ids)
+    }
+
+
+def test_scraper_task_downloads_only_rows_after_the_watermark(yahoo_stub_server, use_stock_setup):
+    """Tests if the scraper appends the new rows to the stored history instead of replacing it."""
+
+    # --- SETUP ---
+    use_stock_setup({"AI": [{"company_name": "Google", "stock_id": "GOOGL"}]})
+    scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+    yahoo_stub_server.histories["GOOGL"] = STUB_CSV + "2024-05-23,2.5,3.5,2.0,3.0,3.0,400\n"
+
+    # --- ACT ---
+    scrape(datetime.date(2024, 5, 23), base_url=yahoo_stub_server.base_url)
+    scrape(datetime.date(2024, 5, 23), base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    df = load_scraped_stocks()
+    assert yahoo_stub_server.requests == ["GOOGL", "GOOGL"]
+    assert list(df["date"].astype(str)) == ["2024-05-20", "2024-05-21", "2024-05-22", "2024-05-23"]
+    assert list(df["volume"]) == [100, 200, 300, 400]
+
+
+def test_scraper_task_refreshes_adjusted_history(yahoo_stub_server, use_stock_setup):
+    """Tests if the whole history is downloaded again when the row at the watermark has changed."""
+
+    # --- SETUP ---
+    use_stock_setup({"AI": [{"company_name": "Google", "stock_id": "GOOGL"}]})
+    scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+    yahoo_stub_server.histories["GOOGL"] = (
+        "Date,Open,High,Low,Close,Adj Close,Volume\n"
+        "2024-05-20,0.5,1.0,0.25,0.75,0.75,200\n"
+        "2024-05-21,0.75,1.25,0.5,1.0,1.0,400\n"
+        "2024-05-22,1.0,1.5,0.75,1.25,1.25,600\n"
+        "2024-05-23,1.25,1.75,1.0,1.5,1.5,800\n"
+    )
+
+    # --- ACT ---
+    scrape(datetime.date(2024, 5, 23), base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    df = load_scraped_stocks()
+    assert yahoo_stub_server.requests == ["GOOGL", "GOOGL", "GOOGL"]
+    assert list(df["close"]) == [0.75, 1.0, 1.25, 1.5]
+
+
+def test_scraper_task_full_refresh_replaces_stored_history(yahoo_stub_server, use_stock_setup):
+    """Tests if the forced full refresh ignores the stored history."""
+
+    # --- SETUP ---
+    use_stock_setup({"AI": [{"company_name": "Google", "stock_id": "GOOGL"}]})
+    scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+
+    # --- ACT ---
+    scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url, full_refresh=True)
+
+    # --- ASSERT ---
+    df = load_scraped_stocks()
+    assert yahoo_stub_server.requests == ["GOOGL", "GOOGL"]
+    assert len(df) == 3
+
+
+def test_scraper_task_removes_stocks_missing_from_setup(yahoo_stub_server, use_stock_setup):
+    """Tests if the stored history of a stock removed from the setup is removed from the store."""
+
+    # --- SETUP ---
+    use_stock_setup(
+        {
+            "AI": [{"company_name": "Google", "stock_id": "GOOGL"}],
+            "gaming": [{"company_name": "Sony", "stock_id": "SONY"}],
+        }
+    )
+    scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+    use_stock_setup({"AI": [{"company_name": "Google", "stock_id": "GOOGL"}]})
+
+    # --- ACT ---
+    scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    df = load_scraped_stocks(columns=["area", "symbol"])
+    assert list(df["symbol"].unique()) == ["GOOGL"]
+    assert list(df["area"].unique()) == ["AI"]
+
+
+def test_scraper_task_puts_failed_stocks_on_dead_letter_list(yahoo_stub_server, use_stock_setup):
+    """Tests if a failing stock does not abort the run and is retried in a later pass."""
+
+    # --- SETUP ---
+    use_stock_setup(
+        {
+            "AI": [{"company_name": "Google", "stock_id": "GOOGL"}],
+            "gaming": [{"company_name": "Sony", "stock_id": "SONY"}, {"company_name": "EA", "stock_id": "EA"}],
+        }
+    )
+    yahoo_stub_server.fail("SONY", 404)
+    yahoo_stub_server.fail("EA", 404, 404)
+
+    # --- ACT ---
+    dead_letters = scrape(datetime.date(2024, 5, 22), base_url=yahoo_stub_server.base_url)
+
+    # --- ASSERT ---
+    df = load_scraped_stocks(columns=["symbol"])
+    assert dead_letters == ["EA"]
+    assert sorted(df["symbol"].unique()) == ["GOOGL", "SONY"]
+    assert sorted(yahoo_stub_server.requests) == ["EA", "EA", "GOOGL", "SONY", "SONY"]
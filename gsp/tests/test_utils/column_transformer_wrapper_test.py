@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
-from gsp.utils.column_transformer_wrapper import ColumnTransformerWrapper
+import pytest
+from gsp.utils.column_transformer_wrapper import ColumnTransformerWrapper, drop_missing_rows
 from sklearn.preprocessing import OneHotEncoder
 
 
@@ -60,3 +62,90 @@ def test_column_transformer_encodes_columns():
     )
     result = result.astype(int)
     assert result.equals(expected)
+
+
+def test_column_transformer_casts_output_to_dtype():
+    # --- SETUP ---
+    X = pd.DataFrame({"a": [1.5, 2.5, 3.5], "b": ["x", "y", "z"]})
+    ct = ColumnTransformerWrapper(
+        transformers=[
+            ("encoder", OneHotEncoder(), ["b"]),
+        ],
+        remainder="passthrough",
+        dtype="float32",
+    )
+
+    # --- ACT ---
+    result = ct.fit_transform(X)
+
+    # --- ASSERT ---
+    assert (result.dtypes == "float32").all()
+    assert result["remainder__a"].tolist() == [1.5, 2.5, 3.5]
+
+
+def test_column_transformer_transforms_with_fitted_encoders():
+    # --- SETUP ---
+    ct = ColumnTransformerWrapper(transformers=[("encoder", OneHotEncoder(handle_unknown="ignore"), ["b"])])
+    ct.fit(pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]}))
+
+    # --- ACT ---
+    result = ct.transform(pd.DataFrame({"a": [4, 5], "b": ["z", "w"]}, index=[10, 11]))
+
+    # --- ASSERT ---
+    expected = pd.DataFrame(
+        {"encoder__b_x": [0, 0], "encoder__b_y": [0, 0], "encoder__b_z": [1, 0], "remainder__a": [4, 5]},
+        index=[10, 11],
+    )
+    assert result.astype(int).equals(expected)
+
+
+def test_column_transformer_without_fit_throws_error():
+    # --- SETUP ---
+    ct = ColumnTransformerWrapper(transformers=[("encoder", OneHotEncoder(), ["b"])])
+
+    # --- ACT & ASSERT ---
+    with pytest.raises(Exception, match="fitted"):
+        ct.transform(pd.DataFrame({"a": [1], "b": ["x"]}))
+
+
+def test_column_transformer_is_restored_from_file(tmp_path):
+    # --- SETUP ---
+    X = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+    ct = ColumnTransformerWrapper(transformers=[("encoder", OneHotEncoder(), ["b"])])
+    expected = ct.fit_transform(X)
+    ct.save(str(tmp_path / "column_transformer.pkl"))
+
+    # --- ACT ---
+    result = ColumnTransformerWrapper.load(str(tmp_path / "column_transformer.pkl")).transform(X)
+
+    # --- ASSERT ---
+    assert result.equals(expected)
+
+
+def test_column_transformer_keeps_sparse_output():
+    # --- SETUP ---
+    X = pd.DataFrame({"a": [1.0, np.nan, 3.0], "b": ["x", "y", "z"]})
+    ct = ColumnTransformerWrapper(transformers=[("encoder", OneHotEncoder(), ["b"])], sparse=True)
+
+    # --- ACT ---
+    result = ct.fit_transform(X)
+
+    # --- ASSERT ---
+    assert all(isinstance(dtype, pd.SparseDtype) for dtype in result.dtypes)
+    assert result.sparse.to_dense().equals(ColumnTransformerWrapper(transformers=ct.transformers).fit_transform(X))
+    assert drop_missing_rows(result).index.tolist() == [0, 2]
+
+
+def test_column_transformer_stores_zeros_of_sparse_passthrough_columns():
+    # --- SETUP ---
+    X = pd.DataFrame({"a": [0.0, np.nan, 3.0], "b": ["x", "y", "z"], "c": [1.0, 0.0, 0.0]})
+    ct = ColumnTransformerWrapper(transformers=[("encoder", OneHotEncoder(), ["b"])], sparse=True)
+
+    # --- ACT ---
+    result = ct.fit_transform(X)
+
+    # --- ASSERT ---
+    coo = result.sparse.to_coo()
+    assert coo.nnz == 3 + 6
+    assert result.sparse.to_dense().equals(ColumnTransformerWrapper(transformers=ct.transformers).fit_transform(X))
+    assert drop_missing_rows(result).index.tolist() == [0, 2]
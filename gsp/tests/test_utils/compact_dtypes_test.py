@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from gsp.utils.compact_dtypes import get_memory_usage_mb, make_compact_dtypes
+
+
+def test_make_compact_dtypes_casts_columns():
+    # --- SETUP ---
+    df = pd.DataFrame(
+        {
+            "close": np.linspace(1, 2, 1000),
+            "year": np.full(1000, 2024),
+            "day_of_week": np.arange(1000) % 5,
+            "area": ["AI", "gaming"] * 500,
+        }
+    )
+
+    # --- ACT ---
+    compact = make_compact_dtypes(df)
+
+    # --- ASSERT ---
+    assert compact.dtypes.to_dict() == {
+        "close": np.dtype("float32"),
+        "year": np.dtype("int16"),
+        "day_of_week": np.dtype("int8"),
+        "area": pd.CategoricalDtype(["AI", "gaming"]),
+    }
+    np.testing.assert_allclose(compact["close"], df["close"], rtol=1e-6)
+    assert get_memory_usage_mb(compact) < get_memory_usage_mb(df) / 2
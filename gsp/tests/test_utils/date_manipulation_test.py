@@ -1,6 +1,7 @@
 import datetime
+import numpy as np
 import pytest
-from gsp.utils.date_utils import get_nth_previous_working_date
+from gsp.utils.date_utils import TradingCalendar, get_nth_previous_working_date
 
 
 @pytest.mark.dev
@@ -99,3 +100,32 @@ def test_get_nth_previous_working_date_with_value_0():
     assert get_nth_previous_working_date(0, friday) == friday
     assert get_nth_previous_working_date(0, saturaday) == friday
     assert get_nth_previous_working_date(0, sunday) == friday
+
+
+def test_trading_calendar_shifts_arrays_of_dates_like_busday_offset():
+    # --- SETUP ---
+    calendar = TradingCalendar(start=datetime.date(2000, 1, 1), end=datetime.date(2030, 12, 31))
+    rng = np.random.default_rng(0)
+    dates = np.datetime64("1995-01-01") + rng.integers(0, 40 * 365, 10_000)
+    n = rng.integers(-300, 300, 10_000)
+
+    # --- ACT ---
+    previous_dates = calendar.get_previous_dates(dates, n)
+
+    # --- ASSERT ---
+    np.testing.assert_array_equal(previous_dates, np.busday_offset(dates, -n, roll="backward"))
+
+
+def test_trading_calendar_skips_holidays():
+    # --- SETUP ---
+    friday = datetime.date(year=2024, month=5, day=24)
+    memorial_day = datetime.date(year=2024, month=5, day=27)
+    calendar = TradingCalendar(holidays=[memorial_day])
+
+    # --- ACT ---
+    next_dates = calendar.get_previous_dates(friday, -np.arange(1, 4))
+
+    # --- ASSERT ---
+    assert next_dates.astype(str).tolist() == ["2024-05-28", "2024-05-29", "2024-05-30"]
+    assert calendar.get_previous_date(0, memorial_day) == friday
+    assert memorial_day not in calendar.get_trading_days(friday, datetime.date(2024, 5, 31)).tolist()
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from gsp.utils.dense_panel import make_dense_panel
+
+
+def create_stocks(symbol_dtype: str) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    dates = pd.period_range("2024-05-01", periods=20, freq="D")
+    df = pd.DataFrame(
+        {
+            "date": [date for date in dates for _ in range(3)],
+            "symbol": ["C", "A", "B"] * len(dates),
+            "area": ["x", "y", "x"] * len(dates),
+            "close": rng.normal(10, 1, 3 * len(dates)),
+        }
+    )
+    df.loc[rng.random(len(df)) < 0.1, "close"] = np.nan
+    df = df.sample(frac=0.7, random_state=0)
+
+    return df.astype({"symbol": symbol_dtype, "area": symbol_dtype})
+
+
+@pytest.mark.parametrize("symbol_dtype", ["category", "object"])
+def test_make_dense_panel_matches_unstacked_fill(symbol_dtype):
+    # --- SETUP ---
+    df = create_stocks(symbol_dtype)
+    dates = pd.date_range("2024-04-29", "2024-05-31", freq="B").to_period("D")
+
+    # --- ACT ---
+    panel = make_dense_panel(df, dates)
+
+    # --- ASSERT ---
+    expected = (
+        pd.DataFrame(index=dates.rename("date"))
+        .join(df.set_index("date"))
+        .set_index("symbol", append=True)
+        .unstack("symbol")
+        .ffill()
+        .bfill()
+        .stack("symbol", future_stack=True)
+        .reset_index()
+        .dropna(subset=["symbol"])
+        .set_index(["date", "symbol"])
+        .sort_index()
+    )
+    pd.testing.assert_frame_equal(panel, expected)
+
+
+def test_make_dense_panel_with_duplicated_rows_throws_error():
+    # --- SETUP ---
+    df = create_stocks("category")
+
+    # --- ACT & ASSERT ---
+    with pytest.raises(ValueError, match="duplicate"):
+        make_dense_panel(pd.concat([df, df.head(1)]), pd.period_range("2024-05-01", periods=20, freq="D"))
@@ -0,0 +1,61 @@
+import os
+import time
+import datetime
+from gsp.utils.disk_cache import DiskCache
+
+
+def test_disk_cache_returns_stored_value(tmp_path):
+    # --- SETUP ---
+    cache = DiskCache(directory=str(tmp_path))
+
+    # --- ACT ---
+    cache.set(["AAPL", datetime.date(2024, 5, 20)], b"value")
+
+    # --- ASSERT ---
+    assert cache.get(["AAPL", datetime.date(2024, 5, 20)]) == b"value"
+    assert cache.get(["AAPL", datetime.date(2024, 5, 21)]) is None
+
+
+def test_disk_cache_expires_entries_after_ttl(tmp_path):
+    # --- SETUP ---
+    cache = DiskCache(directory=str(tmp_path), ttl=datetime.timedelta(hours=1))
+    cache.set("key", b"value")
+    two_hours_ago = time.time() - 2 * 60 * 60
+    os.utime(cache.get_path("key"), (two_hours_ago, two_hours_ago))
+
+    # --- ACT ---
+    value = cache.get("key")
+
+    # --- ASSERT ---
+    assert value is None
+    assert not os.path.exists(cache.get_path("key"))
+
+
+def test_disk_cache_evicts_least_recently_used_entries(tmp_path):
+    # --- SETUP ---
+    cache = DiskCache(directory=str(tmp_path), max_size_bytes=25)
+    for i, key in enumerate(["a", "b"]):
+        cache.set(key, b"0123456789")
+        os.utime(cache.get_path(key), (time.time() - 100 + i, time.time() - 100 + i))
+    cache.get("a")
+
+    # --- ACT ---
+    cache.set("c", b"0123456789")
+
+    # --- ASSERT ---
+    assert cache.get("a") == b"0123456789"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"0123456789"
+
+
+def test_disk_cache_clear_removes_all_entries(tmp_path):
+    # --- SETUP ---
+    cache = DiskCache(directory=str(tmp_path))
+    cache.set("a", b"value")
+    cache.set("b", b"value")
+
+    # --- ACT ---
+    cache.clear()
+
+    # --- ASSERT ---
+    assert cache.list_entries() == []
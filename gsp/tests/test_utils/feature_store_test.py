@@ -0,0 +1,58 @@
+import datetime
+import pandas as pd
+from gsp.utils.feature_store import FeatureStore
+
+SYMBOLS = ["A", "B"]
+
+
+def make_stocks(days: int) -> pd.DataFrame:
+    dates = pd.period_range("2024-01-25", periods=days, freq="D")
+    return pd.DataFrame(
+        {
+            "date": [date for date in dates for _ in SYMBOLS],
+            "symbol": pd.Categorical(SYMBOLS * days),
+            "close": [float(i) for i in range(days * len(SYMBOLS))],
+        }
+    )
+
+
+def build_features(stocks: pd.DataFrame, run_date: datetime.date) -> pd.DataFrame:
+    df = stocks[stocks["date"] <= pd.Period(run_date, freq="D")].sort_values(["date", "symbol"])
+    df = df.assign(close_shift_2=df.groupby("symbol", observed=True)["close"].shift(2))
+    return df.astype({"symbol": str}).set_index(["date", "symbol"])
+
+
+def test_feature_store_update_matches_full_build(tmp_path):
+    # --- SETUP ---
+    stocks = make_stocks(15)
+    calls = []
+
+    def load_stocks(start_date):
+        calls.append(start_date)
+        return stocks if start_date is None else stocks[stocks["date"] >= pd.Period(start_date, freq="D")]
+
+    store = FeatureStore(str(tmp_path), config={"shift": [2]}, tail_size=2, columns=["date", "symbol", "close"])
+    store.update(datetime.date(2024, 1, 30), SYMBOLS, load_stocks, build_features)
+
+    # --- ACT ---
+    features = store.update(datetime.date(2024, 2, 8), SYMBOLS, load_stocks, build_features)
+
+    # --- ASSERT ---
+    assert calls[0] is None and calls[1] is not None
+    pd.testing.assert_frame_equal(features, build_features(stocks, datetime.date(2024, 2, 8)), check_like=True)
+
+
+def test_feature_store_rebuilds_after_adjusted_stocks(tmp_path):
+    # --- SETUP ---
+    stocks = make_stocks(15)
+    store = FeatureStore(
+        str(tmp_path), config={"shift": [2]}, tail_size=2, columns=["date", "symbol", "close"], lookback=1
+    )
+    store.update(datetime.date(2024, 2, 5), SYMBOLS, lambda _: stocks, build_features)
+    stocks["close"] = stocks["close"] * 2
+
+    # --- ACT ---
+    features = store.update(datetime.date(2024, 2, 8), SYMBOLS, lambda _: stocks, build_features)
+
+    # --- ASSERT ---
+    pd.testing.assert_frame_equal(features, build_features(stocks, datetime.date(2024, 2, 8)), check_like=True)
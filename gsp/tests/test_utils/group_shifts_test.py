@@ -1,5 +1,6 @@
+import numpy as np
 import pandas as pd
-from gsp.utils.group_shifts import make_mw_in_groups, make_shift_in_groups
+from gsp.utils.group_shifts import GroupedRolling, make_mw_in_groups, make_shift_in_groups
 
 
 def test_make_shift_in_groups_single_index():
@@ -52,6 +53,41 @@ def test_make_shift_in_groups_multi_index():
     assert df.index.names == ["group", "value2"]
 
 
+def test_make_shift_in_groups_matches_groupby_shift_for_many_columns_and_shifts():
+    # --- SETUP ---
+    rng = np.random.default_rng(0)
+    df = (
+        pd.DataFrame(
+            {
+                "date": np.tile(pd.period_range("2024-01-01", periods=20, freq="D"), 3),
+                "symbol": np.repeat(["c", "a", "b"], 20),
+                "close": rng.random(60),
+                "volume": rng.integers(0, 100, 60),
+            }
+        )
+        .sample(frac=1, random_state=0)
+        .set_index(["date", "symbol"])
+    )
+
+    # --- ACT ---
+    shifted_df = make_shift_in_groups(df=df, groupby=["symbol"], column=["close", "volume"], shift=[2, -1, 0, 25])
+
+    # --- ASSERT ---
+    assert list(shifted_df.columns) == [
+        "close_lag_2",
+        "close_lead_1",
+        "close_lag_25",
+        "volume_lag_2",
+        "volume_lead_1",
+        "volume_lag_25",
+    ]
+    assert shifted_df.index.equals(df.sort_index().index)
+    for column in ["close", "volume"]:
+        for shift, shifted_column in [(2, f"{column}_lag_2"), (-1, f"{column}_lead_1"), (25, f"{column}_lag_25")]:
+            expected = df.groupby("symbol")[column].shift(shift).sort_index()
+            pd.testing.assert_series_equal(shifted_df[shifted_column], expected, check_names=False)
+
+
 def test_make_mw_in_groups_single_index():
     # --- SETUP ---
     df = pd.DataFrame(
@@ -81,3 +117,63 @@ def test_make_mw_in_groups_single_index():
     assert pd.isna(df[df.index == "a"]["shifted"][1])
     assert df[df.index == "a"]["shifted"][2] == 1.5
     assert df[df.index == "a"]["shifted"][3] == 2.5
+
+
+def test_make_mw_in_groups_matches_pandas_rolling_for_all_aggregators():
+    # --- SETUP ---
+    rng = np.random.default_rng(0)
+    values = 100 + rng.normal(0, 1, 90).cumsum()
+    values[[3, 40, 41]] = np.nan
+    df = pd.DataFrame(
+        {
+            "date": np.tile(pd.period_range("2024-01-01", periods=30, freq="D"), 3),
+            "symbol": np.repeat(["c", "a", "b"], 30),
+            "close": values,
+        }
+    ).set_index(["date", "symbol"])
+    aggregators = ["mean", "sum", "std", "var", "min", "max", "median"]
+
+    for center in [False, True]:
+        # --- ACT ---
+        mw_df = make_mw_in_groups(
+            df=df,
+            groupby=["symbol"],
+            column="close",
+            window=[5] * len(aggregators) + [-4] * len(aggregators),
+            center=center,
+            min_periods=2,
+            aggregator=aggregators * 2,  # type: ignore
+        )
+
+        # --- ASSERT ---
+        grouped = df.groupby("symbol")["close"]
+        for aggregator in aggregators:
+            expected_lag = grouped.transform(
+                lambda x: x.shift(1).rolling(5, center=center, min_periods=2).aggregate(aggregator)
+            ).sort_index()
+            expected_lead = grouped.transform(
+                lambda x: x.rolling(4, center=center, min_periods=2).aggregate(aggregator).shift(-4)
+            ).sort_index()
+            pd.testing.assert_series_equal(mw_df[f"close_lag_{aggregator}_5"], expected_lag, check_names=False)
+            pd.testing.assert_series_equal(mw_df[f"close_lead_{aggregator}_4"], expected_lead, check_names=False)
+
+
+def test_grouped_rolling_grows_sparse_tables_for_longer_windows():
+    # --- SETUP ---
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, 40)
+    values[[5, 21]] = np.nan
+    starts = np.array([0, 25])
+    rolling = GroupedRolling(values, starts)
+    groups = pd.Series(values).groupby(np.repeat([0, 1], [25, 15]))
+
+    for window in [2, 3, 9, 15]:
+        for aggregator in ["min", "max"]:
+            # --- ACT ---
+            result = rolling.aggregate(window, False, 1, aggregator)  # type: ignore
+
+            # --- ASSERT ---
+            expected = groups.transform(lambda x: x.rolling(window, min_periods=1).aggregate(aggregator))
+            np.testing.assert_array_equal(result, expected.to_numpy())
+
+    assert [len(table) for table in rolling.sparse_tables.values()] == [4, 4]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from gsp.utils.group_training import fit_predict_groups, get_group_positions
+
+
+def make_frames():
+    index = pd.MultiIndex.from_product([pd.period_range("2024-01-01", periods=6, freq="D"), ["b", "a", "c"]])
+    index = index.set_names(["date", "symbol"])
+    x = np.arange(len(index), dtype="float64")
+    slopes = index.get_level_values("symbol").map({"a": 1.0, "b": 2.0, "c": 3.0}).to_numpy()
+    X = pd.DataFrame({"x": x}, index=index)
+    y = pd.DataFrame({"y_1": slopes * x, "y_2": -slopes * x}, index=index)
+
+    return X, y
+
+
+def test_get_group_positions():
+    # --- SETUP ---
+    index = pd.MultiIndex.from_arrays([[1, 2, 3, 4], ["b", "a", "b", "a"]], names=["date", "symbol"])
+
+    # --- ACT ---
+    positions = get_group_positions(index, "symbol")
+
+    # --- ASSERT ---
+    assert list(positions) == ["a", "b"]
+    np.testing.assert_array_equal(positions["a"], [1, 3])
+    np.testing.assert_array_equal(positions["b"], [0, 2])
+
+
+def test_fit_predict_groups_trains_model_per_group_in_processes():
+    # --- SETUP ---
+    X, y = make_frames()
+    X_query = pd.DataFrame(
+        {"x": [100.0, 100.0, 100.0]},
+        index=pd.MultiIndex.from_arrays(
+            [[pd.Period("2024-02-01", freq="D")] * 3, ["a", "c", "d"]], names=["date", "symbol"]
+        ),
+    )
+
+    # --- ACT ---
+    y_pred = fit_predict_groups(LinearRegression, X, y.sample(frac=1, random_state=0), X_query, n_jobs=2)
+
+    # --- ASSERT ---
+    assert list(y_pred.index.get_level_values("symbol")) == ["a", "c"]
+    np.testing.assert_allclose(y_pred.to_numpy(), [[100.0, -100.0], [300.0, -300.0]])
+
+
+def test_fit_predict_groups_with_sparse_features():
+    # --- SETUP ---
+    X, y = make_frames()
+    X_sparse = X.astype(pd.SparseDtype("float64", 0.0))
+
+    # --- ACT ---
+    y_pred = fit_predict_groups(LinearRegression, X_sparse, y, X_sparse, n_jobs=1)
+
+    # --- ASSERT ---
+    np.testing.assert_allclose(y_pred.sort_index().to_numpy(), y.sort_index().to_numpy(), atol=1e-8)
@@ -0,0 +1,64 @@
+import pandas as pd
+from gsp.utils.matrix_cache import MatrixCache, get_matrix_cache
+
+
+def test_matrix_cache_builds_value_once(tmp_path):
+    # --- SETUP ---
+    cache = MatrixCache(directory=str(tmp_path))
+    calls = []
+
+    def build() -> pd.DataFrame:
+        calls.append(1)
+        return pd.DataFrame({"close": [1.0, 2.0]})
+
+    # --- ACT ---
+    first = cache.get_or_build(["features", "fingerprint", [1, 2]], build)
+    second = cache.get_or_build(["features", "fingerprint", [1, 2]], build)
+    other = cache.get_or_build(["features", "fingerprint", [1, 3]], build)
+
+    # --- ASSERT ---
+    assert second is first
+    pd.testing.assert_frame_equal(other, first)
+    assert len(calls) == 2
+
+
+def test_matrix_cache_serves_values_of_previous_process_from_disk(tmp_path):
+    # --- SETUP ---
+    MatrixCache(directory=str(tmp_path)).get_or_build("key", lambda: pd.DataFrame({"close": [1.0, 2.0]}))
+    cache = MatrixCache(directory=str(tmp_path))
+
+    # --- ACT ---
+    value = cache.get_or_build("key", lambda: pd.DataFrame())
+
+    # --- ASSERT ---
+    pd.testing.assert_frame_equal(value, pd.DataFrame({"close": [1.0, 2.0]}))
+
+
+def test_matrix_cache_keeps_only_recent_values_in_memory(tmp_path):
+    # --- SETUP ---
+    cache = MatrixCache(directory=str(tmp_path), max_memory_entries=2)
+
+    # --- ACT ---
+    for key in ["a", "b", "c"]:
+        cache.get_or_build(key, lambda: key)
+
+    # --- ASSERT ---
+    assert len(cache.memory) == 2
+    assert cache.get_or_build("a", lambda: "rebuilt") == "a"
+
+
+def test_get_matrix_cache_creates_shared_cache_on_first_call(tmp_path, monkeypatch):
+    # --- SETUP ---
+    directory = tmp_path / "matrices"
+    monkeypatch.setattr("gsp.utils.matrix_cache.MATRIX_CACHE_DIR_PATH", str(directory))
+    get_matrix_cache.cache_clear()
+    exists_before_call = directory.exists()
+
+    # --- ACT ---
+    cache = get_matrix_cache()
+
+    # --- ASSERT ---
+    assert exists_before_call is False
+    assert directory.exists()
+    assert get_matrix_cache() is cache
+    get_matrix_cache.cache_clear()
@@ -0,0 +1,55 @@
+import pickle
+import pytest
+import numpy as np
+import pandas as pd
+from xgboost import XGBRegressor
+from gsp.utils.xgboost_matrices import TrainingMatrices, predict_booster, train_booster
+
+
+def make_frames():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((50, 3)), columns=["f1", "f2", "f3"])
+    y = pd.DataFrame(rng.random((50, 2)), columns=["y_1", "y_2"])
+
+    return X, y
+
+
+def test_training_matrices_are_built_once():
+    # --- SETUP ---
+    X, y = make_frames()
+    matrices = TrainingMatrices(X, y)
+
+    # --- ACT ---
+    first = matrices.get_matrix("chain", 1)
+    second = matrices.get_matrix("chain", 1)
+    direct = matrices.get_matrix("direct", 1)
+
+    # --- ASSERT ---
+    assert second is first
+    assert first.num_col() == 4
+    assert direct.num_col() == 3
+    np.testing.assert_allclose(direct.get_label(), y["y_2"].to_numpy())
+    assert pickle.loads(pickle.dumps(matrices)).matrices == {}
+
+
+def test_train_booster_predicts_like_xgb_regressor():
+    # --- SETUP ---
+    X, y = make_frames()
+    hyper_params = {"n_estimators": 10, "max_depth": 3, "subsample": 0.8}
+    model = XGBRegressor(**hyper_params).fit(X, y["y_1"])
+
+    # --- ACT ---
+    booster = train_booster(hyper_params, TrainingMatrices(X, y).get_matrix("direct", 0))
+
+    # --- ASSERT ---
+    np.testing.assert_array_equal(predict_booster(booster, X.to_numpy()), model.predict(X))
+
+
+def test_train_booster_with_other_max_bin_throws_error():
+    # --- SETUP ---
+    X, y = make_frames()
+    matrix = TrainingMatrices(X, y).get_matrix("direct", 0)
+
+    # --- ACT & ASSERT ---
+    with pytest.raises(ValueError):
+        train_booster({"max_bin": 64}, matrix)